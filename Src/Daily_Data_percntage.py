@@ -1,34 +1,127 @@
+import tempfile
+import itertools
 import pandas as pd
-from collections import Counter
-
-def calculate_daily_food_percentages(input_csv, output_csv):
-    df = pd.read_csv(input_csv, encoding="utf-8-sig")
-    df['date'] = pd.to_datetime(df['date'])
-    df['day'] = df['date'].dt.date
-
-    food_keywords = [
-        'طحين', 'سكر', 'زيت', 'رز', 'خبز', 'خميرة','دقيق', 'ملح', 'عدس', 'فول', 'حمص', 'تمر', 'فستق', 'لبن', 'جبنة', 'بيض', 'شاي', 'قهوة', 'معكرونة', 'مكرونة', 'عسل', 'سمك', 'لحم', 'دجاج','برغل','صلصة','حلاوة','السيرج','سيرج','الطحين', 'السكر', 'الزيت', 'الرز', 'الخبز', 'الخميرة', 'الدقيق', 'الملح', 'العدس', 'الفول', 'الحمص', 'التمر', 'الفستق', 'اللبن', 'الجبنة', 'البيض', 'الشاي', 'القهوة', 'المعكرونة', 'المكرونة', 'العسل', 'السمك', 'اللحم', 'الدجاج',
-        # Vegetables
-        'بطاطا', 'بطاطس', 'بندورة', 'طماطم', 'خيار', 'فلفل', 'باذنجان', 'كوسا', 'جزر', 'بصل', 'ثوم', 'ملفوف', 'زهرة', 'فاصوليا', 'بازيلاء', 'سبانخ', 'خس', 'جرجير', 'فجل', 'قرع', 'فطر', 'ورق عنب', 'فول اخضر', 'فول أخضر', 'شمندر', 'كرفس', 'نعنع', 'بقدونس', 'كزبرة', 'شبت',
-        # Fruits
-        'تفاح', 'موز', 'برتقال', 'ليمون', 'عنب', 'رمان', 'خوخ', 'مشمش', 'دراق', 'كمثرى', 'اجاص', 'تين', 'بطيخ', 'شمام', 'فراولة', 'كيوي', 'مانجو', 'مانغا', 'جوافة', 'اناناس', 'بابايا', 'رمان', 'كرز', 'توت', 'تمر هندي', 'قشطة', 'جريب فروت', 'يوسفي', 'نكتارين', 'برقوق', 'جوز الهند'
-    ]
+import metrics
+from keyword_matcher import KeywordMatcher
+from daily_cube import counts_path
+from sparse_daily import SparseDaily
+from storage import PartitionedStore
+
+# One entry per product: canonical name -> other spellings. Articles ('السكر'),
+# alef/taa-marbuta forms and diacritics are folded by the matcher itself.
+food_items = {
+    'طحين': ['دقيق'], 'سكر': [], 'زيت': [], 'رز': ['أرز'], 'خبز': [], 'خميرة': [], 'ملح': [], 'عدس': [], 'فول': [], 'حمص': [], 'تمر': [], 'فستق': [], 'لبن': [], 'جبنة': [], 'بيض': [], 'شاي': [], 'قهوة': [], 'معكرونة': ['مكرونة'], 'عسل': [], 'سمك': [], 'لحم': [], 'دجاج': [], 'برغل': [], 'صلصة': [], 'حلاوة': [], 'سيرج': [],
+    # Vegetables
+    'بطاطا': ['بطاطس'], 'بندورة': ['طماطم'], 'خيار': [], 'فلفل': [], 'باذنجان': [], 'كوسا': [], 'جزر': [], 'بصل': [], 'ثوم': [], 'ملفوف': [], 'زهرة': [], 'فاصوليا': [], 'بازيلاء': [], 'سبانخ': [], 'خس': [], 'جرجير': [], 'فجل': [], 'قرع': [], 'فطر': [], 'ورق عنب': [], 'فول أخضر': [], 'شمندر': [], 'كرفس': [], 'نعنع': [], 'بقدونس': [], 'كزبرة': [], 'شبت': [],
+    # Fruits
+    'تفاح': [], 'موز': [], 'برتقال': [], 'ليمون': [], 'عنب': [], 'رمان': [], 'خوخ': [], 'مشمش': [], 'دراق': [], 'اجاص': ['كمثرى'], 'تين': [], 'بطيخ': [], 'شمام': [], 'فراولة': [], 'كيوي': [], 'مانجو': ['مانغا'], 'جوافة': [], 'اناناس': [], 'بابايا': [], 'كرز': [], 'توت': [], 'تمر هندي': [], 'قشطة': [], 'جريب فروت': [], 'يوسفي': [], 'نكتارين': [], 'برقوق': [], 'جوز الهند': []
+}
+
+# Compiled once and shared by every call
+food_matcher = KeywordMatcher(food_items)
+# Rows read per chunk when streaming a posts CSV
+CHUNKSIZE = 50_000
+
+
+def count_daily_food(posts, matcher=food_matcher):
+    """Accumulate food keyword counts per day from an iterable of (day, text) pairs."""
+    day_counts = {}
+    for day, text in posts:
+        counts = day_counts.get(day)
+        if counts is None:
+            counts = day_counts[day] = [0] * len(matcher)
+        matcher.count(text, counts)
+    return day_counts
+
+
+def merge_day_counts(target, partial):
+    """Add per-day count vectors from ``partial`` into ``target`` in place."""
+    for day, counts in partial.items():
+        acc = target.get(day)
+        if acc is None:
+            target[day] = list(counts)
+        else:
+            for i, c in enumerate(counts):
+                if c:
+                    acc[i] += c
+    return target
+
+
+def iter_csv_chunks_by_date(input_csv, chunksize=CHUNKSIZE, date_column='date'):
+    """A posts CSV as DataFrames in date order, each at most a chunk (or one day) of posts.
+
+    A file that fits in one chunk is just sorted. A longer one is spilled
+    to a temporary day-partitioned store and read back a day at a time,
+    since its chunks may come in any order (the shipped CSVs are newest
+    first); memory stays bounded by the chunk size.
+    """
+    chunks = pd.read_csv(input_csv, encoding="utf-8-sig", chunksize=chunksize)
+    first, second = next(chunks, None), next(chunks, None)
+    if second is None:
+        if first is not None:
+            yield first.iloc[pd.to_datetime(first[date_column], utc=True).argsort(kind='stable')]
+        return
+    with tempfile.TemporaryDirectory() as root:
+        store = PartitionedStore(root)
+        for chunk in itertools.chain((first, second), chunks):
+            store.write("posts", chunk.rename(columns={date_column: 'date'}), mode="append")
+        for _, df in store.iter_partitions("posts"):
+            yield df.sort_values('date', kind='stable').rename(columns={'date': date_column}).reset_index(drop=True)
+
+
+def iter_csv_posts(input_csv, chunksize=CHUNKSIZE, date_column='date', post_filter=None):
+    """Stream (day, text) pairs from a posts CSV, ``chunksize`` rows at a time.
+
+    ``post_filter`` (e.g. dedup.RepostFilter) drops reposts from each chunk
+    before anything else is done with it. It needs the posts in date
+    order, so the chunks then come from ``iter_csv_chunks_by_date``.
+    """
+    if post_filter is not None and date_column in pd.read_csv(input_csv, encoding="utf-8-sig", nrows=0).columns:
+        chunks = iter_csv_chunks_by_date(input_csv, chunksize, date_column)
+    else:
+        post_filter = None
+        chunks = pd.read_csv(input_csv, encoding="utf-8-sig", chunksize=chunksize)
+    for chunk in chunks:
+        if post_filter is not None:
+            with metrics.stage("build.dedup", rows_in=len(chunk)) as record:
+                chunk = post_filter.filter_frame(chunk, date_column)
+                record['rows_out'] = len(chunk)
+        if date_column in chunk.columns:
+            days = pd.to_datetime(chunk[date_column]).dt.date
+        else:
+            days = chunk['day']
+        yield from zip(days, chunk['text'])
+
+
+def daily_percentages(day_counts, matcher=food_matcher):
+    """Convert per-day count vectors into the daily percentage table."""
     results = []
-    for day, group in df.groupby('day'):
-        text = " ".join(group['text'].dropna())
-        words = text.split()
-        food_words = [w for w in words if w in food_keywords]
-        total_food_words = len(food_words)
+    for day in sorted(day_counts):
+        counts = day_counts[day]
+        total_food_words = sum(counts)
 
         if total_food_words == 0:
             continue
-        word_freq = Counter(food_words)
         daily_data = {'day': day}
 
-        for food in food_keywords:
-            daily_data[food] = round((word_freq[food] / total_food_words) * 100, 2) if food in word_freq else 0.0
+        for food, count in zip(matcher.items, counts):
+            daily_data[food] = round((count / total_food_words) * 100, 2) if count else 0.0
 
         results.append(daily_data)
 
-    daily_df = pd.DataFrame(results)
+    return pd.DataFrame(results)
+
+
+def save_daily_outputs(day_counts, output_csv, matcher=food_matcher):
+    """Write the daily percentages CSV and the sparse raw counts next to it; returns the counts."""
+    daily_df = daily_percentages(day_counts, matcher)
     daily_df.to_csv(output_csv, index=False, encoding="utf-8-sig")
+    sparse = SparseDaily.from_day_counts(day_counts, matcher.items)
+    sparse.save(counts_path(output_csv))
+    return sparse
+
+
+def calculate_daily_food_percentages(input_csv, output_csv, chunksize=CHUNKSIZE):
+    # Only one chunk of posts and one count vector per day are held in memory
+    day_counts = count_daily_food(iter_csv_posts(input_csv, chunksize))
+    save_daily_outputs(day_counts, output_csv)
@@ -0,0 +1,337 @@
+import os
+import re
+import argparse
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import metrics
+from Daily_Data_percntage import food_matcher, save_daily_outputs, merge_day_counts, iter_csv_posts, CHUNKSIZE
+from dedup import RepostFilter
+from daily_matrix import save_daily_matrices
+from sparse_daily import SparseDaily
+from storage import PartitionedStore, DATA_DIR, RAW, RAW_COLUMNS, CLASSIFIED, DAILY, DAILY_COLUMNS
+
+# Label -> regex rule; a post can match several labels (demand and supply)
+DEFAULT_RULES = {
+    'demand': "مطلوب",
+    'supply': "متوفر|للبيع|موجود|المعنيس",
+}
+
+# Label -> daily percentages output
+DEFAULT_OUTPUTS = {
+    'demand': os.path.join(DATA_DIR, "DailyDemand.csv"),
+    'supply': os.path.join(DATA_DIR, "DailySellers.csv"),
+}
+
+
+class PostClassifier:
+    def __init__(self, rules=None):
+        self.rules = dict(rules or DEFAULT_RULES)
+        self.patterns = {label: re.compile(rule, re.IGNORECASE) for label, rule in self.rules.items()}
+
+    def labels(self, text):
+        """Return the labels a single post matches, e.g. ('demand',) or ('demand', 'supply')."""
+        if not isinstance(text, str):
+            return ()
+        return tuple(label for label, pattern in self.patterns.items() if pattern.search(text))
+
+
+def iter_labeled_posts(posts, classifier):
+    """Turn (day, text) pairs into (day, text, labels) for posts matching at least one rule."""
+    for day, text in posts:
+        labels = classifier.labels(text)
+        if labels:
+            yield day, text, labels
+
+
+def aggregate_labeled_posts(labeled_posts, labels, matcher=food_matcher, label_counts=None, post_totals=None):
+    """Count (day, text, labels) posts in one pass.
+
+    ``labeled_posts`` can be any iterable, including a generator over a
+    file far larger than memory. Each post is tokenized once and its count
+    vector is added to every label it carries. Pass the previous
+    ``label_counts`` and ``post_totals`` to keep accumulating across chunks.
+    Returns ({label: {day: counts}}, {label: post count}).
+    """
+    if label_counts is None:
+        label_counts = {label: {} for label in labels}
+    if post_totals is None:
+        post_totals = {label: 0 for label in labels}
+    for day, text, post_labels in labeled_posts:
+        counts = matcher.count(text)
+        for label in post_labels:
+            post_totals[label] += 1
+            day_counts = label_counts[label]
+            acc = day_counts.get(day)
+            if acc is None:
+                day_counts[day] = counts[:]
+            else:
+                for i, c in enumerate(counts):
+                    if c:
+                        acc[i] += c
+    return label_counts, post_totals
+
+
+# Raw day partitions classified and saved together
+BATCH_DAYS = 32
+
+
+def iter_raw_batches(store, start_date=None, end_date=None, batch_days=BATCH_DAYS):
+    """Raw posts ``batch_days`` day partitions at a time, as (days, DataFrame sorted by date)."""
+    batch = []
+    for day, df in store.iter_partitions(RAW, start_date, end_date, columns=RAW_COLUMNS):
+        batch.append((day, df.sort_values('date', kind='stable')))
+        if len(batch) == batch_days:
+            yield [day for day, _ in batch], pd.concat([df for _, df in batch], ignore_index=True)
+            batch = []
+    if batch:
+        yield [day for day, _ in batch], pd.concat([df for _, df in batch], ignore_index=True)
+
+
+def label_batch(store, classifier, days, df):
+    """Classify a batch of raw posts, save it to the classified dataset and return its (day, text, labels) posts."""
+    labels = list(classifier.rules)
+    post_labels = [classifier.labels(text) for text in df['text']]
+    kept = [found for found in post_labels if found]
+    classified = df[[bool(found) for found in post_labels]]
+    classified = classified.assign(**{label: [label in found for found in kept] for label in labels},
+                                   label=["+".join(found) for found in kept])
+    # One write per batch; days without labeled posts are cleared too
+    store.replace(CLASSIFIED, classified, days[0], days[-1])
+    return list(zip(pd.to_datetime(classified['date'], utc=True).dt.date, classified['text'], kept))
+
+
+def iter_store_posts(store, classifier, start_date=None, end_date=None, post_filter=None):
+    """Classify the raw store a batch of day partitions at a time.
+
+    Reposts are dropped first when a ``post_filter`` is given. Labeled
+    posts are saved to the classified dataset and yielded as
+    (day, text, labels).
+    """
+    for days, df in iter_raw_batches(store, start_date, end_date):
+        if post_filter is not None:
+            with metrics.stage("build.dedup", rows_in=len(df)) as record:
+                df = post_filter.filter_frame(df)
+                record['rows_out'] = len(df)
+        with metrics.stage("build.classify", rows_in=len(df)) as record:
+            posts = label_batch(store, classifier, days, df)
+            record['rows_out'] = len(posts)
+        yield from posts
+
+
+def merge_label_counts(target, partial):
+    """Merge partial {label: {day: counts}} results, e.g. from separate chunks."""
+    for label, day_counts in partial.items():
+        merge_day_counts(target.setdefault(label, {}), day_counts)
+    return target
+
+
+# Per-worker state, set once by the pool initializer
+_worker = {}
+
+
+def _init_worker(store_root, rules, post_filter):
+    _worker['store'] = PartitionedStore(store_root)
+    _worker['classifier'] = PostClassifier(rules)
+    _worker['post_filter'] = post_filter
+
+
+def _fingerprint_shard(shard):
+    """Repost fingerprints of a day range, per day and in the order the serial filter sees them.
+
+    Returns ([(day, post times, fingerprints)], stages recorded by the
+    worker); see ``RepostFilter.fingerprints`` for the compact layout.
+    """
+    store, post_filter = _worker['store'], _worker['post_filter']
+    result = []
+    with metrics.capture() as run, metrics.stage("build.fingerprint") as record:
+        for day, df in store.iter_partitions(RAW, *shard, columns=RAW_COLUMNS):
+            df = df.sort_values('date', kind='stable')
+            times = pd.to_datetime(df['date'], utc=True).to_numpy()
+            result.append((day, times, post_filter.fingerprints(df['text'].tolist())))
+        record['rows_in'] = sum(len(times) for _, times, _ in result)
+    return result, run.stages
+
+
+def _count_shard(shard, keep=None):
+    """Classify and count a day range; ``keep`` maps day -> repost mask over its date-sorted posts.
+
+    Returns (label counts, post totals, stages recorded by the worker).
+    """
+    store, classifier = _worker['store'], _worker['classifier']
+    labels = list(classifier.rules)
+    label_counts, post_totals = None, None
+    # Includes the nested build.classify stages, like build.aggregate on the serial path
+    with metrics.capture() as run, metrics.stage("build.count", caches={'keywords': food_matcher.token_table}) as record:
+        for days, df in iter_raw_batches(store, *shard):
+            if keep is not None:
+                df = df[np.concatenate([keep[day] for day in days])]
+            with metrics.stage("build.classify", rows_in=len(df)) as classified:
+                posts = label_batch(store, classifier, days, df)
+                classified['rows_out'] = len(posts)
+            label_counts, post_totals = aggregate_labeled_posts(
+                posts, labels, label_counts=label_counts, post_totals=post_totals)
+        if label_counts is None:
+            label_counts, post_totals = {label: {} for label in labels}, {label: 0 for label in labels}
+        record['rows_out'] = sum(post_totals.values())
+    return label_counts, post_totals, run.stages
+
+
+def plan_shards(store, n_shards, start_date=None, end_date=None, max_days=None):
+    """Split the raw day partitions into contiguous (first day, last day) ranges.
+
+    Up to ``n_shards`` ranges, or more when needed to keep each within
+    ``max_days`` partitions.
+    """
+    days = [day for day, _ in store.partitions(RAW, start_date, end_date)]
+    if max_days:
+        n_shards = max(n_shards, -(-len(days) // max_days))
+    n_shards = min(n_shards, len(days))
+    return [(days[i * len(days) // n_shards], days[(i + 1) * len(days) // n_shards - 1]) for i in range(n_shards)]
+
+
+def aggregate_store_parallel(store, classifier, workers, start_date=None, end_date=None, post_filter=None):
+    """``aggregate_labeled_posts(iter_store_posts(...))`` spread over a process pool.
+
+    The raw days are cut into contiguous shards of at most ``BATCH_DAYS``
+    days, at least a few per worker. Whether a post is a repost depends on
+    every earlier post, so workers only compute the costly repost
+    fingerprints; the decisions are then taken here in day order, and each
+    shard's kept posts are classified and counted by a worker. At most
+    two jobs per worker of each kind are in flight, so memory here depends
+    on the shard size, not on the archive. Partial counts are merged in
+    shard order, so the result is identical to the serial path.
+    """
+    labels = list(classifier.rules)
+    label_counts = {label: {} for label in labels}
+    post_totals = {label: 0 for label in labels}
+    shards = plan_shards(store, workers * 4, start_date, end_date, max_days=BATCH_DAYS)
+    in_flight = 2 * workers
+
+    def collect(future):
+        partial_counts, partial_totals, stages = future.result()
+        metrics.merge(stages)
+        merge_label_counts(label_counts, partial_counts)
+        for label, total in partial_totals.items():
+            post_totals[label] += total
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(store.root, classifier.rules, post_filter)) as pool:
+        counted = deque()
+
+        def count(shard, keep=None):
+            counted.append(pool.submit(_count_shard, shard, keep))
+            while len(counted) > in_flight:
+                collect(counted.popleft())
+
+        if post_filter is None:
+            for shard in shards:
+                count(shard)
+        else:
+            # Fingerprinting runs a few shards ahead of the decisions taken here
+            ahead = iter(shards)
+            fingerprinted = deque(pool.submit(_fingerprint_shard, shard) for shard in itertools.islice(ahead, in_flight))
+            for shard in shards:
+                fingerprints, stages = fingerprinted.popleft().result()
+                following = next(ahead, None)
+                if following is not None:
+                    fingerprinted.append(pool.submit(_fingerprint_shard, following))
+                metrics.merge(stages)
+                with metrics.stage("build.dedup", rows_in=sum(len(times) for _, times, _ in fingerprints)) as record:
+                    keep = {day: post_filter.check_many(times, fps) for day, times, fps in fingerprints}
+                    record['rows_out'] = int(sum(mask.sum() for mask in keep.values()))
+                del fingerprints
+                count(shard, keep)
+        while counted:
+            collect(counted.popleft())
+    return label_counts, post_totals
+
+
+def build_daily_percentages(raw_csv=None, outputs=None, rules=None, chunksize=CHUNKSIZE,
+                            store=None, start_date=None, end_date=None, dedup=True, workers=1):
+    """Stream the raw posts once and write the daily percentages for every label.
+
+    By default the raw day partitions of ``store`` are read ``BATCH_DAYS``
+    partitions at a time; pass ``raw_csv`` to read a legacy RawData.csv
+    ``chunksize`` rows at a time instead. Either way peak memory depends on
+    the batch or chunk size and the number of days, not on the archive size. Daily results go to the
+    store and to the CSVs in ``outputs``; with ``start_date``/``end_date``
+    only those days are replaced and the CSVs are rewritten from the whole
+    stored history. With ``dedup`` (default), exact and near-duplicate
+    reposts within 24 hours are collapsed before classification. With
+    ``workers`` > 1 the store is aggregated in parallel by day range
+    (see ``aggregate_store_parallel``), with the same results.
+    """
+    outputs = outputs or DEFAULT_OUTPUTS
+    classifier = PostClassifier(rules)
+    store = store or PartitionedStore()
+    post_filter = RepostFilter() if dedup else None
+
+    # Includes the nested build.dedup and build.classify stages; the rest is keyword counting. With
+    # workers, the classifying and counting is recorded in each worker's build.count stage instead.
+    caches = {'keywords': food_matcher.token_table} if workers <= 1 else None
+    with metrics.stage("build.aggregate", caches=caches) as record:
+        if raw_csv is not None:
+            if workers > 1:
+                raise ValueError("Parallel aggregation reads the day-partitioned raw store, not a CSV")
+            source = raw_csv
+            posts = iter_labeled_posts(iter_csv_posts(raw_csv, chunksize, post_filter=post_filter), classifier)
+            label_counts, post_totals = aggregate_labeled_posts(posts, list(classifier.rules))
+        elif workers > 1:
+            source = store.dataset_dir(RAW)
+            label_counts, post_totals = aggregate_store_parallel(store, classifier, workers, start_date, end_date,
+                                                                 post_filter)
+        else:
+            source = store.dataset_dir(RAW)
+            posts = iter_store_posts(store, classifier, start_date, end_date, post_filter)
+            label_counts, post_totals = aggregate_labeled_posts(posts, list(classifier.rules))
+        if post_filter is not None:
+            record['rows_in'] = post_filter.seen
+        record['rows_out'] = sum(post_totals.values())
+    if post_filter is not None:
+        print(f"Dropped {post_filter.dropped} of {post_filter.seen} posts as reposts")
+
+    # A date range only replaces its own days; the CSVs and count cube still cover the whole store
+    partial = raw_csv is None and (start_date is not None or end_date is not None)
+    with metrics.stage("build.save") as record:
+        record['rows_out'] = 0
+        for label, day_counts in label_counts.items():
+            print(f"Found {post_totals[label]} {label} posts in {source}")
+            if label not in outputs:
+                continue
+            if label in DAILY:
+                # Long (day, item, count) rows; only non-zero cells are stored
+                sparse = SparseDaily.from_day_counts(day_counts, food_matcher.items)
+                if partial:
+                    store.replace(DAILY[label], sparse.to_frame(), start_date, end_date)
+                    stored = store.read(DAILY[label], columns=DAILY_COLUMNS)
+                    day_counts = SparseDaily.from_frame(stored, food_matcher.items).to_day_counts()
+                else:
+                    store.replace(DAILY[label], sparse.to_frame())
+            if not day_counts:
+                print(f"No {label} posts found in {source}.")
+                continue
+            save_daily_outputs(day_counts, outputs[label])
+            record['rows_out'] += len(day_counts)
+            print(f"Daily {label} percentages saved to {outputs[label]}")
+        # Memory-mapped demand/supply matrices over every stored day, for the dashboard
+        if all(store.exists(name) for name in DAILY.values()):
+            save_daily_matrices(store)
+    return label_counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classify raw posts and build the daily demand/supply percentages")
+    parser.add_argument("--csv", help="read a legacy RawData.csv instead of the raw store")
+    parser.add_argument("--since", help="first day (YYYY-MM-DD) to rebuild from the store")
+    parser.add_argument("--until", help="last day (YYYY-MM-DD) to rebuild from the store")
+    parser.add_argument("--keep-duplicates", action="store_true", help="count reposts instead of collapsing them")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes aggregating the store by day range (default 1, serial)")
+    args = parser.parse_args()
+
+    with metrics.run("build"):
+        build_daily_percentages(args.csv, start_date=args.since, end_date=args.until,
+                                dedup=not args.keep_duplicates, workers=args.workers)
@@ -1,48 +1,258 @@
-import telethon
-import re
-from telethon import TelegramClient
-from datetime import datetime, timezone
-import nest_asyncio
+import os
+import json
+import argparse
 import asyncio
+from datetime import datetime, timedelta, timezone
 import pandas as pd
-import json
+import nest_asyncio
+import metrics
+from storage import PartitionedStore, RAW, RAW_COLUMNS, DATA_DIR
+
+CONFIG_PATH = "config.json"
+RAW_CSV = os.path.join(DATA_DIR, "RawData.csv")
+# Last seen message id per channel, so each run only fetches newer posts
+CHECKPOINT_PATH = os.path.join(DATA_DIR, "checkpoints.json")
+BATCH_SIZE = 500
+CONCURRENCY = 4
+MAX_FLOOD_RETRIES = 5
+FLOOD_BACKOFF_BASE = 1
+
+
+class FloodWait(Exception):
+    """Raised by fake clients to simulate Telegram's FloodWaitError."""
+
+    def __init__(self, seconds):
+        super().__init__(f"A wait of {seconds} seconds is required")
+        self.seconds = seconds
+
+
+try:
+    from telethon.errors import FloodWaitError
+    FLOOD_WAIT_ERRORS = (FloodWait, FloodWaitError)
+except ImportError:
+    FLOOD_WAIT_ERRORS = (FloodWait,)
+
+
+def load_config(path=CONFIG_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_checkpoints(path=CHECKPOINT_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoints(checkpoints, path=CHECKPOINT_PATH):
+    # Write to a temp file first so an interrupted run never leaves a corrupt checkpoint
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoints, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def append_posts(posts, store):
+    """Append a batch of {message id: row} posts to the raw day partitions."""
+    if not posts:
+        return 0
+    df = pd.DataFrame([posts[msg_id] for msg_id in sorted(posts)], columns=RAW_COLUMNS)
+    return store.write(RAW, df, mode="append")
+
+
+def parse_date(value, end_of_day=False):
+    """UTC datetime of an ISO date; with ``end_of_day`` a bare date (YYYY-MM-DD) means its last microsecond.
+
+    Values without an offset are taken as UTC; an explicit offset is converted.
+    """
+    if value is None or isinstance(value, datetime):
+        return value
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    else:
+        parsed = parsed.astimezone(timezone.utc)
+    if end_of_day and len(value) == 10:
+        # --until 2025-08-01 includes the posts of 1 August
+        parsed += timedelta(days=1, microseconds=-1)
+    return parsed
+
+
+def clear_channel_posts(store, channels, start_date=None, end_date=None):
+    """Remove the raw posts of ``channels`` between two dates, before they are fetched again."""
+    keys = {str(channel_id) for channel_id in channels}
+
+    def refetched(df):
+        dates = pd.to_datetime(df['date'], utc=True)
+        mask = df['channel'].astype(str).isin(keys)
+        if start_date is not None:
+            mask &= dates >= pd.Timestamp(start_date)
+        if end_date is not None:
+            mask &= dates <= pd.Timestamp(end_date)
+        return mask
 
+    return store.drop_rows(RAW, refetched, start_date, end_date)
 
-nest_asyncio.apply()
-# Load configuration from JSON file
-with open("config.json", "r", encoding="utf-8") as f:
-    config = json.load(f)
 
-api_id = config['api_id']
-api_hash = config['api_hash']
-channel_id = config['channel_id']
-# Initialize the Telegram client
+async def fetch_channel(client, channel_id, checkpoints, queue, start_date=None, end_date=None,
+                        batch_size=BATCH_SIZE, max_retries=MAX_FLOOD_RETRIES):
+    """Fetch posts newer than the channel's checkpoint, oldest first.
 
-client = TelegramClient('session_name', api_id, api_hash)
-messages= dict()
-async def main():
+    Posts are keyed by message id and handed to the writer in batches
+    through ``queue``. Without a checkpoint the fetch starts at
+    ``start_date``. A FloodWait pauses this channel only and the fetch
+    resumes after the last message already seen.
+    """
+    key = str(channel_id)
+    channel = await client.get_entity(channel_id)
+    last_id = checkpoints.get(key, 0)
+    batch, count, retries = {}, 0, 0
+
+    while True:
+        resume_id = last_id
+        if last_id:
+            messages = client.iter_messages(channel, min_id=last_id, reverse=True)
+        else:
+            messages = client.iter_messages(channel, offset_date=start_date, reverse=True)
+        try:
+            async for msg in messages:
+                # Oldest first, so everything after end_date can be skipped at once
+                if end_date and msg.date > end_date:
+                    break
+                if msg.text:
+                    batch[msg.id] = {"id": msg.id, "channel": key, "date": msg.date, "text": msg.text}
+                last_id = max(last_id, msg.id)
+
+                if len(batch) >= batch_size:
+                    await queue.put((key, batch, last_id))
+                    count += len(batch)
+                    batch = {}
+            break
+        except FLOOD_WAIT_ERRORS as e:
+            # Only consecutive floods without progress count towards the limit
+            retries = 1 if last_id > resume_id else retries + 1
+            if retries > max_retries:
+                raise
+            delay = max(e.seconds, FLOOD_BACKOFF_BASE * 2 ** (retries - 1))
+            print(f" FloodWait on {key}: sleeping {delay}s (retry {retries}/{max_retries})")
+            await asyncio.sleep(delay)
+
+    await queue.put((key, batch, last_id))
+    return count + len(batch)
+
+
+async def write_batches(queue, checkpoints, store, checkpoint_path=CHECKPOINT_PATH):
+    """Single writer: append each batch to the raw store, then advance its checkpoint."""
+    while True:
+        item = await queue.get()
+        if item is None:
+            break
+        key, batch, last_id = item
+        with metrics.stage("ingest.write", rows_in=len(batch)) as record:
+            record['rows_out'] = append_posts(batch, store)
+        checkpoints[key] = last_id
+        save_checkpoints(checkpoints, checkpoint_path)
+
+
+async def fetch_channels(client, channels, checkpoints, start_date=None, end_date=None,
+                         concurrency=CONCURRENCY, store=None, checkpoint_path=CHECKPOINT_PATH,
+                         batch_size=BATCH_SIZE):
+    """Fetch several channels concurrently, at most ``concurrency`` at a time.
+
+    ``client`` only needs ``get_entity`` and ``iter_messages`` (see
+    fake_telegram.FakeTelegramClient). Returns {channel: new posts}; a
+    channel that fails is reported and maps to its exception. If the
+    writer fails, the fetchers are cancelled and its exception is raised.
+    """
+    store = store or PartitionedStore()
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    writer = asyncio.create_task(write_batches(queue, checkpoints, store, checkpoint_path))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(channel_id):
+        async with semaphore:
+            return await fetch_channel(client, channel_id, checkpoints, queue,
+                                       start_date, end_date, batch_size)
+
+    fetchers = asyncio.gather(*(bounded(c) for c in channels), return_exceptions=True)
+    stop = None
+    try:
+        # A failed writer no longer drains the bounded queue, so it is watched alongside the fetchers
+        await asyncio.wait({fetchers, writer}, return_when=asyncio.FIRST_COMPLETED)
+        if writer.done():
+            writer.result()  # the writer only ends before the sentinel by raising
+        results = fetchers.result()
+        stop = asyncio.ensure_future(queue.put(None))
+        await asyncio.wait({stop, writer}, return_when=asyncio.FIRST_COMPLETED)
+        await writer
+    finally:
+        # Batches still queued were never checkpointed, so cancelling loses nothing
+        pending = [task for task in (fetchers, writer, stop) if task is not None and not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    for channel_id, result in zip(channels, results):
+        if isinstance(result, Exception):
+            print(f" Failed to fetch {channel_id}: {result!r}")
+    return dict(zip(channels, results))
+
+
+def make_client(config):
+    from telethon import TelegramClient
+    return TelegramClient('session_name', config['api_id'], config['api_hash'])
+
+
+async def main(start_date=None, end_date=None, full=False, concurrency=None, export_csv=False):
+    with metrics.run("ingest"):
+        await _ingest(start_date, end_date, full, concurrency, export_csv)
+
+
+async def _ingest(start_date, end_date, full, concurrency, export_csv):
+    config = load_config()
+    client = make_client(config)
     await client.start()
     print(" Connected to Telegram")
-    channel = await client.get_entity(channel_id)
-    # Make dates timezone-aware (UTC)
-    start_date = datetime(2025,8 , 2, 14, 59, 59, tzinfo=timezone.utc)
-    end_date = datetime(2025, 8 , 6, 12, 59, 59, tzinfo=timezone.utc)
-
-    count = 0
-    async for msg in client.iter_messages(channel, 
-                                          offset_date=end_date,
-                                            reverse=False):
-        if start_date <= msg.date <= end_date:
-            if msg.text:
-                print(f"[{msg.date}] {msg.sender_id}: {msg.text}")
-                messages[msg.date]=msg.text
-                count += 1
-
-    print(f"\n Total plain text messages between {start_date.date()} and {end_date.date()} is : {count}")
+
+    channels = config.get('channels') or [config['channel_id']]
+    checkpoints = load_checkpoints()
+    start_date = start_date or parse_date(config.get('start_date'))
+    end_date = end_date or parse_date(config.get('end_date'), end_of_day=True)
+    concurrency = concurrency or config.get('concurrency', CONCURRENCY)
+
+    store = PartitionedStore()
+    if full:
+        # The refetch appends every post again, so the stored copies go first
+        removed = clear_channel_posts(store, channels, start_date, end_date)
+        print(f" Removed {removed} stored posts of {len(channels)} channel(s) before the full refetch")
+        for channel_id in channels:
+            checkpoints.pop(str(channel_id), None)
+        save_checkpoints(checkpoints)
+    with metrics.stage("ingest.fetch") as record:
+        results = await fetch_channels(client, channels, checkpoints, start_date, end_date, concurrency, store)
+        record['rows_out'] = sum(count for count in results.values() if not isinstance(count, Exception))
+    for channel_id, count in results.items():
+        if not isinstance(count, Exception):
+            print(f" Saved {count} new plain text messages from {channel_id} "
+                  f"(last message id: {checkpoints.get(str(channel_id))})")
     await client.disconnect()
 
-asyncio.run(main())
+    if export_csv:
+        with metrics.stage("ingest.export_csv") as record:
+            count = record['rows_out'] = store.export_csv(RAW, RAW_CSV)
+        print(f" Exported {count} raw posts to {RAW_CSV}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch new Telegram posts into the raw store (Data/store/raw)")
+    parser.add_argument("--since", help="start date (YYYY-MM-DD) when a channel has no checkpoint yet")
+    parser.add_argument("--until", help="last day to fetch (YYYY-MM-DD, inclusive)")
+    parser.add_argument("--full", action="store_true",
+                        help="replace the stored posts of every channel by a refetch from --since")
+    parser.add_argument("--concurrency", type=int, help=f"channels fetched at once (default {CONCURRENCY})")
+    parser.add_argument("--csv", action="store_true", help=f"also export the whole raw store to {RAW_CSV}")
+    args = parser.parse_args()
 
-# Save messages dict to CSV with date and text columns
-df = pd.DataFrame(list(messages.items()), columns=["date", "text"])
-df.to_csv(r"Data\RawData02.csv", index=False, encoding="utf-8-sig")
\ No newline at end of file
+    nest_asyncio.apply()
+    asyncio.run(main(parse_date(args.since), parse_date(args.until, end_of_day=True), args.full, args.concurrency, args.csv))
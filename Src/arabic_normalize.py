@@ -0,0 +1,94 @@
+import re
+
+# Tashkeel and tatweel
+_MARKS = r"[ً-ْٰـ]"
+# ... and anything that is not a letter or digit
+_NOISE = re.compile(rf"{_MARKS}|[^\w]")
+_TEXT_MARKS = re.compile(_MARKS)
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+_ORTHOGRAPHY = str.maketrans({'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا', 'ى': 'ي', 'ة': 'ه'})
+# Definite article, alone or behind a conjunction/preposition; longest first.
+# 'لل' is ل + ال ('للسكر'); before a stem starting with lam one lam is dropped ('للبن' = ل + اللبن).
+_ARTICLES = ('وبال', 'وال', 'بال', 'فال', 'كال', 'ولل', 'لل', 'ال')
+# Shortest stem left after stripping, so short words are not eaten
+_MIN_STEM = 2
+
+
+def normalize_token(token):
+    """Canonical spelling of one word: no diacritics or punctuation, one alef/yaa/haa form."""
+    return _NOISE.sub("", token).translate(_ORTHOGRAPHY)
+
+
+def normalize_text(text):
+    """Canonical form of a whole post: no diacritics or punctuation, one alef/yaa/haa form, single spaces, lowercase."""
+    text = _PUNCTUATION.sub(" ", _TEXT_MARKS.sub("", text))
+    return _SPACES.sub(" ", text).strip().lower().translate(_ORTHOGRAPHY)
+
+
+def strip_article(word):
+    """'السكر' -> 'سكر'; a normalized word without its article, or unchanged."""
+    for article in _ARTICLES:
+        if word.startswith(article) and len(word) - len(article) >= _MIN_STEM:
+            return word[len(article):]
+    return word
+
+
+def article_stems(word):
+    """Every stem a normalized word can have behind an article, longest article first.
+
+    'للبن' gives 'بن' and 'لبن'. Callers keep the first stem they know,
+    so stripping never turns a word into something that is not listed.
+    """
+    for article in _ARTICLES:
+        if word.startswith(article) and len(word) - len(article) >= _MIN_STEM:
+            yield word[len(article):]
+            if article.endswith('لل'):
+                yield 'ل' + word[len(article):]
+
+
+def strip_conjunction(token):
+    """'وسكر' -> 'سكر'; None when there is no leading 'و' to drop.
+
+    Only tried for words that are not known as they stand, so 'ورق' stays 'ورق'.
+    """
+    if token.startswith('و') and len(token) - 1 >= _MIN_STEM:
+        return token[1:]
+    return None
+
+
+class TokenTable:
+    """Memoized raw token -> value table.
+
+    Every distinct spelling is normalized and resolved once; afterwards a
+    token costs a single dict hit. ``resolve`` maps a normalized token to
+    its value. Growth is capped at ``max_size`` entries so a stream of
+    unseen words cannot exhaust memory; past the cap new tokens are still
+    resolved, just not remembered.
+    """
+
+    def __init__(self, resolve, normalize=normalize_token, max_size=500_000):
+        self.resolve = resolve
+        self.normalize = normalize
+        self.max_size = max_size
+        self._table = {}
+        self.lookups = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._table)
+
+    @property
+    def hits(self):
+        return self.lookups - self.misses
+
+    def __getitem__(self, token):
+        self.lookups += 1
+        try:
+            return self._table[token]
+        except KeyError:
+            self.misses += 1
+            value = self.resolve(self.normalize(token))
+            if len(self._table) < self.max_size:
+                self._table[token] = value
+            return value
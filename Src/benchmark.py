@@ -0,0 +1,251 @@
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+import numpy as np
+import pandas as pd
+import metrics
+from storage import PartitionedStore, RAW
+from synthetic_posts import SyntheticPosts, write_raw_store
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+SCALES = (10_000, 100_000)
+# Largest scale that also runs the stages holding every post in memory
+# (fake Telegram ingestion, RawData.csv export and the legacy CSV path)
+FULL_MAX = 1_000_000
+# A stage slower than baseline × TOLERANCE is reported as a regression
+TOLERANCE = 1.25
+# Stages shorter than this are too noisy to compare
+MIN_COMPARE_SECONDS = 0.05
+
+
+@contextmanager
+def stage(stages, name, rows_in=None, trace_memory=False):
+    """Time the block and store its record in ``stages[name]``; set ``record['rows_out']`` inside."""
+    record = {'rows_in': rows_in}
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record['seconds'] = time.perf_counter() - started
+        if rows_in:
+            record['rows_per_s'] = rows_in / record['seconds'] if record['seconds'] else None
+        if trace_memory:
+            record['peak_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+        stages[name] = record
+        peak = f" {record['peak_mb']:8.1f} MB" if trace_memory else ""
+        print(f" {name:<26} {record['seconds']:9.3f}s{peak}")
+
+
+def time_chart(stages, name, render, repeat, trace_memory=False):
+    """First-call and median time of a chart rendered to PNG without the render cache."""
+    times = []
+    with stage(stages, name, trace_memory=trace_memory) as record:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            png = render()
+            times.append(time.perf_counter() - started)
+        record['first_seconds'] = times[0]
+        record['median_seconds'] = statistics.median(times)
+        record['png_bytes'] = len(png) if png else 0
+
+
+def run_scale(n_posts, workdir, seed=0, workers=1, repeat=3, full_max=FULL_MAX, trace_memory=False):
+    """Run every pipeline stage and chart type on n_posts synthetic posts; returns {stage: record}."""
+    from RawData import fetch_channels
+    from fake_telegram import FakeTelegramClient
+    from MarketPosts import build_daily_percentages
+    from Daily_Data_percntage import calculate_daily_food_percentages
+    from dedup import RepostFilter
+    from visualizer import FoodMarketVisualizer
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    os.makedirs(workdir)
+    store = PartitionedStore(os.path.join(workdir, "store"))
+    generator = SyntheticPosts(seed)
+    outputs = {'demand': os.path.join(workdir, "DailyDemand.csv"), 'supply': os.path.join(workdir, "DailySellers.csv")}
+    stages = {}
+    print(f"\n {n_posts:,} posts")
+
+    if n_posts <= full_max:
+        channels = generator.channel_posts(n_posts)
+        client = FakeTelegramClient(channels, page_size=1000)
+        with stage(stages, "ingest", n_posts, trace_memory) as record:
+            fetched = asyncio.run(fetch_channels(client, list(channels), {}, store=store, batch_size=5000,
+                                                 checkpoint_path=os.path.join(workdir, "checkpoints.json")))
+            record['rows_out'] = sum(v for v in fetched.values() if isinstance(v, int))
+        del channels, client
+    else:
+        with stage(stages, "generate", n_posts, trace_memory) as record:
+            record['rows_out'] = write_raw_store(store, n_posts, generator)
+
+    with stage(stages, "dedup", n_posts, trace_memory) as record:
+        post_filter = RepostFilter()
+        for _, df in store.iter_partitions(RAW, columns=['date', 'text']):
+            post_filter.filter_frame(df.sort_values('date'))
+        record['rows_out'] = post_filter.seen - post_filter.dropped
+
+    with stage(stages, "build", n_posts, trace_memory) as record:
+        label_counts = build_daily_percentages(outputs=outputs, store=store)
+        record['rows_out'] = sum(len(days) for days in label_counts.values())
+    with stage(stages, "build_no_dedup", n_posts, trace_memory) as record:
+        label_counts = build_daily_percentages(outputs=outputs, store=store, dedup=False)
+        record['rows_out'] = sum(len(days) for days in label_counts.values())
+    if workers > 1:
+        with stage(stages, f"build_{workers}_workers", n_posts, trace_memory) as record:
+            label_counts = build_daily_percentages(outputs=outputs, store=store, workers=workers)
+            record['rows_out'] = sum(len(days) for days in label_counts.values())
+
+    if n_posts <= full_max:
+        raw_csv = os.path.join(workdir, "RawData.csv")
+        with stage(stages, "export_csv", n_posts, trace_memory) as record:
+            record['rows_out'] = store.export_csv(RAW, raw_csv)
+        with stage(stages, "daily_percentages_csv", n_posts, trace_memory):
+            calculate_daily_food_percentages(raw_csv, os.path.join(workdir, "DailyAll.csv"))
+
+    with stage(stages, "load_visualizer", trace_memory=trace_memory):
+        viz = FoodMarketVisualizer.from_matrices(store)
+    with stage(stages, "derive", len(viz.demand_df), trace_memory):
+        viz.gap_panel
+        viz.correlation_stats
+
+    # The most mentioned item over the last full month of data
+    item = viz.correlation_stats['demand'].top_items(1)[0]
+    last_day = pd.Timestamp(viz.demand_df['day'].iloc[-1])
+    month = (last_day + pd.Timedelta(days=1)).to_period('M') - 1
+    start_date, end_date = month.to_timestamp(), month.to_timestamp(how='end').normalize()
+    charts = {
+        'chart_daily': lambda: viz.plot_daily(item, start_date=start_date, end_date=end_date),
+        'chart_difference': lambda: viz.plot_difference(item, start_date=start_date, end_date=end_date),
+        'chart_pie': lambda: viz.plot_total_food_percentages(outputs['demand'], start_date, end_date),
+        'chart_correlation': lambda: viz.plot_correlation_matrix('demand'),
+        'chart_month_bar': lambda: viz.plot_daily_comparison_bar_for_month(item, month.year, month.month),
+    }
+    for name, render in charts.items():
+        time_chart(stages, name, render, repeat, trace_memory)
+    return stages
+
+
+def _run_scale_with_peak(*args):
+    """run_scale plus the peak resident memory (MB) of the process that ran it."""
+    stages = run_scale(*args)
+    return stages, metrics._peak_rss_mb()
+
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scales=SCALES, seed=0, workers=1, repeat=3, full_max=FULL_MAX, trace_memory=False,
+        workdir=None, results_dir=RESULTS_DIR):
+    """Benchmark every scale and write the results JSON; returns (results, path)."""
+    started = datetime.now(timezone.utc)
+    results = {
+        'meta': {
+            'started': started.isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'seed': seed,
+            'workers': workers,
+            'memory_traced': trace_memory,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'runs': [],
+    }
+    own_workdir = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix="food-market-bench-")
+    try:
+        for n_posts in scales:
+            # Each scale runs in a fresh process, so its peak memory does not include the earlier scales
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                stages, peak = pool.submit(_run_scale_with_peak, n_posts, os.path.join(workdir, str(n_posts)),
+                                           seed, workers, repeat, full_max, trace_memory).result()
+            results['runs'].append({
+                'posts': n_posts,
+                'max_rss_mb': peak,
+                'stages': stages,
+            })
+    finally:
+        if own_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, f"bench-{started:%Y%m%dT%H%M%S}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    return results, path
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Stages slower (or, when both traced memory, larger) than the baseline by more than ``tolerance``."""
+    regressions = []
+    baseline_runs = {run['posts']: run['stages'] for run in baseline['runs']}
+    for run in results['runs']:
+        before = baseline_runs.get(run['posts'])
+        if before is None:
+            continue
+        for name, record in run['stages'].items():
+            old = before.get(name)
+            if old is None:
+                continue
+            key = 'median_seconds' if 'median_seconds' in record else 'seconds'
+            if old.get(key, 0) >= MIN_COMPARE_SECONDS and record[key] > old[key] * tolerance:
+                regressions.append((run['posts'], name, key, old[key], record[key]))
+            if old.get('peak_mb') and record.get('peak_mb') and record['peak_mb'] > old['peak_mb'] * tolerance:
+                regressions.append((run['posts'], name, 'peak_mb', old['peak_mb'], record['peak_mb']))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time and memory-profile the pipeline on synthetic posts")
+    parser.add_argument("--posts", type=int, nargs="+", default=list(SCALES),
+                        help=f"scales to run, in posts (default {' '.join(map(str, SCALES))})")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="also time the parallel build with this many workers")
+    parser.add_argument("--repeat", type=int, default=3, help="renders per chart type (default 3)")
+    parser.add_argument("--full-max", type=int, default=FULL_MAX,
+                        help=f"largest scale that runs the in-memory ingestion and CSV stages (default {FULL_MAX})")
+    parser.add_argument("--memory", action="store_true",
+                        help="trace peak Python/NumPy memory per stage (slows every stage down)")
+    parser.add_argument("--workdir", help="keep the generated data here instead of a temporary directory")
+    parser.add_argument("--out", default=RESULTS_DIR, help=f"results directory (default {RESULTS_DIR})")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help=f"slowdown ratio reported as a regression (default {TOLERANCE})")
+    args = parser.parse_args()
+
+    results, path = run(args.posts, args.seed, args.workers, args.repeat, args.full_max, args.memory,
+                        args.workdir, args.out)
+    print(f"\n Results saved to {path}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for posts, name, key, old, new in regressions:
+            print(f" Regression at {posts:,} posts: {name} {key} {old:.3f} -> {new:.3f} ({new / old:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f" No stage regressed beyond {args.tolerance:.2f}x of {args.baseline}")
@@ -0,0 +1,53 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# Budget for a fresh process to import the dashboard modules and load the data
+# into its first visualizer, before any chart is drawn
+COLD_START_TARGET_SECONDS = 2.0
+
+# The dashboard's own load path: LiveData over the store's matrices, the store
+# or the daily CSVs, whichever exists. No render cache, so the first chart is
+# always drawn and nothing is written.
+PROBE = r"""
+import json, time
+t0 = time.perf_counter()
+from live_data import LiveData
+t1 = time.perf_counter()
+viz = LiveData(cache=None).current()
+t2 = time.perf_counter()
+demand_df = viz.demand_df
+viz.plot_daily(demand_df.columns[1], demand_df['day'].min(), demand_df['day'].max())
+t3 = time.perf_counter()
+print(json.dumps({
+    "import": t1 - t0,
+    "load_data": t2 - t1,
+    "first_chart": t3 - t2,
+}))
+"""
+
+
+def measure(src_dir="Src"):
+    """Run the probe in a fresh interpreter and return its timings in seconds."""
+    env = dict(os.environ, PYTHONPATH=src_dir, MPLBACKEND="Agg")
+    result = subprocess.run([sys.executable, "-c", PROBE], env=env, capture_output=True, text=True, check=True)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["cold_start"] = timings["import"] + timings["load_data"]
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the dashboard cold start against its target")
+    parser.add_argument("--target", type=float, default=COLD_START_TARGET_SECONDS,
+                        help=f"cold start budget in seconds (default {COLD_START_TARGET_SECONDS})")
+    args = parser.parse_args()
+
+    timings = measure()
+    for stage, seconds in timings.items():
+        print(f" {stage:<17} {seconds * 1000:8.1f} ms")
+    if timings["cold_start"] > args.target:
+        print(f" Cold start {timings['cold_start']:.2f}s exceeds the {args.target:.2f}s target")
+        sys.exit(1)
+    print(f" Cold start {timings['cold_start']:.2f}s is within the {args.target:.2f}s target")
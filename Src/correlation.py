@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+from day_range import day_rows
+
+
+class CorrelationStats:
+    """Running sufficient statistics (n, Σx, Σxxᵀ) for every item pair.
+
+    Days are appended in order with ``append_day``; every ``block`` days a
+    snapshot of the cumulative sums is kept. The sums over any day range
+    are the difference of two prefixes, each being a snapshot plus fewer
+    than ``block`` rows, so a window query never rescans history and costs
+    O(block · items²) whatever the archive length. Snapshots need
+    days / block · items² floats.
+    """
+
+    def __init__(self, items, block=32):
+        self.items = list(items)
+        self.item_index = {item: i for i, item in enumerate(self.items)}
+        self.block = block
+        k = len(self.items)
+        self.days = np.empty(0, dtype='datetime64[ns]')
+        self._rows = np.empty((0, k))
+        self._n = 0
+        # Snapshot b holds Σx and Σxxᵀ over rows [0, b * block)
+        self._sums = [np.zeros(k)]
+        self._cross = [np.zeros((k, k))]
+
+    @classmethod
+    def from_frame(cls, df, block=32):
+        """Statistics for a daily frame with a 'day' column and one numeric column per item."""
+        if not df['day'].is_monotonic_increasing:
+            df = df.sort_values('day')
+        items = cls.numeric_columns(df)
+        stats = cls(items, block)
+        stats.extend(df['day'], df[items].to_numpy(dtype=float))
+        return stats
+
+    @staticmethod
+    def numeric_columns(df):
+        """The item columns ``from_frame`` keeps: numeric ones other than 'day'."""
+        return df.drop(columns=['day'], errors='ignore').select_dtypes(include='number').columns
+
+    def __len__(self):
+        return self._n
+
+    def extend(self, days, values):
+        """Add many days in order.
+
+        Into empty statistics the rows are taken as they are (a frame viewing
+        a memory-mapped matrix is not copied unless it holds NaN) and the
+        snapshots are summed a block at a time.
+        """
+        if self._n:
+            for day, row in zip(days, values):
+                self.append_day(day, row)
+            return
+        self._take(days, values)
+
+    def _take(self, days, values):
+        """Make ``values`` the rows and sum the snapshots not held yet, a block at a time."""
+        days = np.asarray(pd.to_datetime(days), dtype='datetime64[ns]')
+        if (np.diff(days) <= np.timedelta64(0)).any():
+            i = int(np.flatnonzero(np.diff(days) <= np.timedelta64(0))[0])
+            raise ValueError(f"Days must be appended in order, got {days[i + 1]} after {days[i]}")
+        rows = np.asarray(values, dtype=float).reshape(len(days), len(self.items))
+        if np.isnan(rows).any():
+            rows = np.nan_to_num(rows)
+        self._rows, self.days, self._n = rows, days, len(days)
+
+        start = (len(self._sums) - 1) * self.block
+        blocks = rows[start:self._n - self._n % self.block].reshape(-1, self.block, len(self.items))
+        self._sums.extend(self._sums[-1] + np.cumsum(blocks.sum(axis=1), axis=0))
+        self._cross.extend(self._cross[-1] + np.cumsum(np.einsum('bij,bik->bjk', blocks, blocks), axis=0))
+
+    def updated(self, days, values, first):
+        """Statistics over new rows of the same items that equal this one's rows before row ``first``.
+
+        The snapshots of the unchanged blocks are shared, so only the days
+        from the block holding ``first`` on are summed again.
+        """
+        stats = CorrelationStats(self.items, self.block)
+        kept = min(first, self._n) // self.block
+        stats._sums, stats._cross = self._sums[:kept + 1], self._cross[:kept + 1]
+        stats._take(days, values)
+        return stats
+
+    def append_day(self, day, values):
+        """Add one day's item values (missing values count as 0)."""
+        day = np.datetime64(pd.Timestamp(day), 'ns')
+        if self._n and day <= self.days[self._n - 1]:
+            raise ValueError(f"Days must be appended in order, got {day} after {self.days[self._n - 1]}")
+        row = np.nan_to_num(np.asarray(values, dtype=float))
+
+        # Grow storage geometrically so appends stay amortized O(items)
+        if self._n == len(self._rows):
+            capacity = max(2 * len(self._rows), self.block)
+            rows = np.empty((capacity, len(self.items)))
+            rows[:self._n] = self._rows[:self._n]
+            days = np.empty(capacity, dtype='datetime64[ns]')
+            days[:self._n] = self.days[:self._n]
+            self._rows, self.days = rows, days
+        self._rows[self._n] = row
+        self.days[self._n] = day
+        self._n += 1
+
+        if self._n % self.block == 0:
+            block_rows = self._rows[self._n - self.block:self._n]
+            self._sums.append(self._sums[-1] + block_rows.sum(axis=0))
+            self._cross.append(self._cross[-1] + block_rows.T @ block_rows)
+
+    def _prefix(self, t):
+        """Σx and Σxxᵀ over the first ``t`` days."""
+        b = t // self.block
+        rest = self._rows[b * self.block:t]
+        return self._sums[b] + rest.sum(axis=0), self._cross[b] + rest.T @ rest
+
+    def bounds(self, start_date=None, end_date=None):
+        rows = day_rows(self.days[:self._n], start_date, end_date)
+        return rows.start, rows.stop
+
+    def window_stats(self, start_date=None, end_date=None):
+        """(n, Σx, Σxxᵀ) over a date range (inclusive)."""
+        lo, hi = self.bounds(start_date, end_date)
+        sums_hi, cross_hi = self._prefix(hi)
+        sums_lo, cross_lo = self._prefix(lo)
+        return hi - lo, sums_hi - sums_lo, cross_hi - cross_lo
+
+    def totals(self, start_date=None, end_date=None):
+        _, sums, _ = self.window_stats(start_date, end_date)
+        return pd.Series(sums, index=self.items)
+
+    def top_items(self, top_n=10, start_date=None, end_date=None):
+        return self.totals(start_date, end_date).sort_values(ascending=False).head(top_n).index.tolist()
+
+    def corr(self, items=None, start_date=None, end_date=None):
+        """Pearson correlation of the items over a date range, like ``DataFrame.corr()``."""
+        items = list(items) if items is not None else self.items
+        idx = [self.item_index[item] for item in items]
+        n, sums, cross = self.window_stats(start_date, end_date)
+        if n < 2:
+            return pd.DataFrame(np.nan, index=items, columns=items)
+
+        sums, cross = sums[idx], cross[np.ix_(idx, idx)]
+        cov = cross - np.outer(sums, sums) / n
+        std = np.sqrt(np.clip(np.diag(cov), 0, None))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = cov / np.outer(std, std)
+        corr[np.outer(std, std) == 0] = np.nan
+        return pd.DataFrame(np.clip(corr, -1, 1), index=items, columns=items)
+
+    def rolling_corr(self, window, end_date=None, items=None):
+        """Correlation over the ``window`` calendar days ending at ``end_date`` (default: the last day).
+
+        Same values as ``df.rolling(f"{window}D").corr()`` at that day.
+        """
+        end = pd.Timestamp(end_date) if end_date is not None else pd.Timestamp(self.days[self._n - 1])
+        return self.corr(items, end - pd.Timedelta(days=window - 1), end)
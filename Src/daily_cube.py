@@ -0,0 +1,88 @@
+import os
+import numpy as np
+import pandas as pd
+from sparse_daily import SparseDaily
+
+
+def counts_path(csv_path):
+    """Path of the sparse daily counts saved next to a daily percentages CSV."""
+    return os.path.splitext(csv_path)[0] + "_counts.parquet"
+
+
+class DailyCube:
+    """Raw per-day, per-item keyword counts with cumulative prefix sums, kept in memory.
+
+    Rows cover every calendar day from the first to the last day, so a date
+    maps to its row by subtraction and any date-range total is the
+    difference of two prefix rows: O(1) in the number of days.
+    """
+
+    def __init__(self, days, items, counts):
+        days = np.asarray(days, dtype='datetime64[D]')
+        counts = np.asarray(counts, dtype=np.int64).reshape(len(days), len(items))
+        self.items = list(items)
+
+        if len(days):
+            order = np.argsort(days)
+            days, counts = days[order], counts[order]
+            self.start = days[0]
+            n_days = int((days[-1] - self.start).astype(int)) + 1
+        else:
+            self.start = np.datetime64('1970-01-01', 'D')
+            n_days = 0
+
+        # Densify onto a contiguous calendar; days without posts stay zero
+        self.counts = np.zeros((n_days, len(self.items)), dtype=np.int64)
+        np.add.at(self.counts, (days - self.start).astype(int), counts)
+        self.prefix = np.zeros((n_days + 1, len(self.items)), dtype=np.int64)
+        np.cumsum(self.counts, axis=0, out=self.prefix[1:])
+
+    @classmethod
+    def from_day_counts(cls, day_counts, items):
+        days = sorted(day_counts)
+        counts = [day_counts[day] for day in days]
+        return cls(days, items, np.array(counts, dtype=np.int64).reshape(len(days), len(items)))
+
+    @property
+    def days(self):
+        return self.start + np.arange(len(self.counts))
+
+    @classmethod
+    def from_sparse(cls, sparse):
+        days, rows = np.unique(sparse.days, return_inverse=True)
+        counts = np.zeros((len(days), len(sparse.items)), dtype=np.int64)
+        np.add.at(counts, (rows, sparse.item_codes.astype(np.int64)), sparse.counts)
+        return cls(days, sparse.items, counts)
+
+    def to_sparse(self):
+        rows, codes = np.nonzero(self.counts)
+        return SparseDaily(self.days[rows], codes, self.counts[rows, codes], self.items)
+
+    def save(self, path):
+        # Stored sparse; the dense prefix sums are rebuilt in memory on load
+        self.to_sparse().save(path)
+
+    @classmethod
+    def load(cls, path):
+        return cls.from_sparse(SparseDaily.load(path))
+
+    def _offset(self, date):
+        return int((np.datetime64(pd.Timestamp(date).date(), 'D') - self.start).astype(int))
+
+    def totals(self, start_date=None, end_date=None):
+        """Per-item counts between two dates (inclusive), as an array aligned with ``items``."""
+        n_days = len(self.counts)
+        lo = 0 if start_date is None else min(max(self._offset(start_date), 0), n_days)
+        hi = n_days if end_date is None else min(max(self._offset(end_date) + 1, lo), n_days)
+        return self.prefix[hi] - self.prefix[lo]
+
+    def total_series(self, start_date=None, end_date=None):
+        return pd.Series(self.totals(start_date, end_date), index=self.items)
+
+    def shares(self, start_date=None, end_date=None):
+        """Volume-weighted percentage of each item over the date range."""
+        totals = self.total_series(start_date, end_date)
+        grand_total = totals.sum()
+        if grand_total == 0:
+            return totals.astype(float)
+        return totals / grand_total * 100
@@ -0,0 +1,98 @@
+import os
+import json
+import time
+import numpy as np
+import pandas as pd
+from storage import PartitionedStore, DAILY, load_daily_frames
+from day_range import day_rows
+
+
+def matrix_path(store, name):
+    """Manifest of a daily matrix inside a store, e.g. Data/store/matrix/daily_demand.json."""
+    return os.path.join(store.root, "matrix", f"{name}.json")
+
+
+class DailyMatrix:
+    """Day × item percentages backed by a read-only, memory-mapped .npy file.
+
+    Every process that loads the matrix maps the same file, so the values
+    live once in the OS page cache however many sessions or workers use
+    them, and nothing is parsed. A small JSON manifest holds the days, the
+    items and the name of the current values file; saving writes a new
+    values file and then replaces the manifest, so a reader always gets a
+    matching set. Date ranges are row slices found by binary search.
+    """
+
+    def __init__(self, days, items, values, values_file=None):
+        self.days = np.asarray(days, dtype='datetime64[ns]')
+        self.items = list(items)
+        self.item_index = {item: i for i, item in enumerate(self.items)}
+        self.values = values
+        # Name of the loaded values file; unique to each save, so it also names the data version
+        self.values_file = values_file
+
+    @classmethod
+    def from_frame(cls, df):
+        df = df.sort_values('day')
+        items = [c for c in df.columns if c != 'day']
+        return cls(pd.to_datetime(df['day']).values, items, df[items].to_numpy(dtype=float))
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(path))[0]
+        values_file = f"{stem}-{time.time_ns()}.npy"
+        np.save(os.path.join(directory, values_file), np.ascontiguousarray(self.values, dtype=float))
+
+        manifest = {
+            'days': [str(day) for day in self.days.astype('datetime64[D]')],
+            'items': self.items,
+            'values': values_file,
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+        # Older values files stay readable for processes that still map them. Windows refuses
+        # to delete a mapped file; it is left behind and removed by a later save.
+        for entry in os.listdir(directory):
+            if entry.startswith(f"{stem}-") and entry.endswith(".npy") and entry != values_file:
+                try:
+                    os.remove(os.path.join(directory, entry))
+                except OSError:
+                    pass
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        for attempt in range(2):
+            with open(path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            values_path = os.path.join(os.path.dirname(path), manifest['values'])
+            try:
+                values = np.load(values_path, mmap_mode='r' if mmap else None)
+                break
+            except FileNotFoundError:
+                # Replaced between reading the manifest and opening its file
+                if attempt:
+                    raise
+        return cls(np.array(manifest['days'], dtype='datetime64[ns]'), manifest['items'], values, manifest['values'])
+
+    def bounds(self, start_date=None, end_date=None):
+        """Row slice covering the dates (inclusive)."""
+        return day_rows(self.days, start_date, end_date)
+
+    def frame(self, start_date=None, end_date=None):
+        """Daily frame ('day' + one column per item) viewing the mapped values, without copying them."""
+        rows = self.bounds(start_date, end_date)
+        df = pd.DataFrame(self.values[rows], columns=self.items, copy=False)
+        df.insert(0, 'day', self.days[rows])
+        return df
+
+
+def save_daily_matrices(store=None):
+    """Write the demand/supply matrices of a store from its daily partitions (same columns on both sides)."""
+    store = store or PartitionedStore()
+    frames = load_daily_frames(store)
+    for name, df in zip(DAILY.values(), frames):
+        DailyMatrix.from_frame(df).save(matrix_path(store, name))
@@ -0,0 +1,16 @@
+import numpy as np
+import pandas as pd
+
+
+def day_rows(days, start_date=None, end_date=None):
+    """Row slice of a sorted datetime64 array covering two dates (inclusive), found by binary search.
+
+    Bounds are truncated to the array's unit, so a start time on a day still
+    includes that day when the days are stored as datetime64[D].
+    """
+    def position(date, side):
+        return int(np.searchsorted(days, pd.Timestamp(date).to_datetime64().astype(days.dtype), side=side))
+
+    lo = 0 if start_date is None else position(start_date, 'left')
+    hi = len(days) if end_date is None else position(end_date, 'right')
+    return slice(lo, max(hi, lo))
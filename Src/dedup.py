@@ -0,0 +1,147 @@
+import zlib
+import hashlib
+from collections import deque
+import numpy as np
+import pandas as pd
+from arabic_normalize import normalize_text
+
+_PRIME = (1 << 31) - 1
+
+
+class RepostFilter:
+    """Drops exact and near-duplicate posts seen within a sliding time window.
+
+    Exact reposts are caught by a hash of the normalized text. Near
+    duplicates (same offer with small edits) are found with MinHash
+    signatures over character shingles, bucketed by LSH bands, and
+    confirmed when the estimated Jaccard similarity reaches ``threshold``.
+    Only posts from the last ``window`` are remembered, so memory is
+    bounded by the posting rate, not by the stream length. Posts must come
+    in chronological order; an earlier post than the latest one seen
+    raises ValueError, since its window could no longer be matched.
+    """
+
+    def __init__(self, window=pd.Timedelta(hours=24), threshold=0.8, num_perm=64, bands=16, shingle=5, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.window = pd.Timedelta(window)
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle = shingle
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, num_perm, dtype=np.uint64)
+
+        self._recent = deque()   # (time, entry id, exact key, band keys) in arrival order
+        self._exact = {}         # exact key -> number of live entries
+        self._buckets = {}       # band key -> ids of live entries
+        self._signatures = {}    # entry id -> MinHash signature
+        self._next_id = 0
+        self._latest = None
+        self.seen = 0
+        self.dropped = 0
+
+    def signature(self, text):
+        n = self.shingle
+        shingles = {text[i:i + n] for i in range(max(len(text) - n + 1, 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        # (a·x + b) mod p for every permutation, then the minimum per permutation; below 2**31, so 4 bytes each
+        return ((np.outer(hashes, self._a) + self._b) % _PRIME).min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, signature):
+        r = self.rows
+        return [(band, signature[band * r:(band + 1) * r].tobytes()) for band in range(self.bands)]
+
+    def _expire(self, now):
+        while self._recent and now - self._recent[0][0] > self.window:
+            _, entry, exact_key, band_keys = self._recent.popleft()
+            del self._signatures[entry]
+            remaining = self._exact[exact_key] - 1
+            if remaining:
+                self._exact[exact_key] = remaining
+            else:
+                del self._exact[exact_key]
+            for key in band_keys:
+                bucket = self._buckets[key]
+                bucket.remove(entry)
+                if not bucket:
+                    del self._buckets[key]
+
+    def is_duplicate(self, time, text):
+        """True if the post repeats one seen within the window; otherwise remembers it."""
+        if not isinstance(text, str):
+            self.seen += 1
+            return False
+        normalized = normalize_text(text)
+        return self._check(time, self._exact_key(normalized), lambda: self.signature(normalized))
+
+    def fingerprints(self, texts):
+        """Exact keys and MinHash signatures of many posts, as compact arrays (keys, signatures, has_text).
+
+        Hashing is the costly part of ``is_duplicate``; fingerprints can be
+        computed elsewhere (e.g. in worker processes) and checked in order
+        with ``check_many``, giving the same decisions. A post costs 8 bytes
+        of key and 4 per permutation of signature.
+        """
+        keys = np.zeros(len(texts), dtype=np.uint64)
+        signatures = np.zeros((len(texts), len(self._a)), dtype=np.uint32)
+        has_text = np.zeros(len(texts), dtype=bool)
+        for i, text in enumerate(texts):
+            if isinstance(text, str):
+                normalized = normalize_text(text)
+                keys[i], signatures[i], has_text[i] = self._exact_key(normalized), self.signature(normalized), True
+        return keys, signatures, has_text
+
+    def check_many(self, times, fingerprints):
+        """``is_duplicate`` for posts fingerprinted by ``fingerprints``; returns the mask of posts to keep."""
+        keys, signatures, has_text = fingerprints
+        keep = np.ones(len(keys), dtype=bool)
+        for i, time in enumerate(pd.to_datetime(times, utc=True)):
+            if not has_text[i]:
+                self.seen += 1
+                continue
+            # A copy, so a remembered signature does not keep the whole batch alive
+            keep[i] = not self._check(time, int(keys[i]), signatures[i].copy)
+        return keep
+
+    @staticmethod
+    def _exact_key(normalized):
+        return int.from_bytes(hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest(), "little")
+
+    def _check(self, time, exact_key, get_signature):
+        self.seen += 1
+        time = pd.Timestamp(time)
+        if time.tzinfo is None:
+            time = time.tz_localize("UTC")
+        if self._latest is not None and time < self._latest:
+            raise ValueError(f"Posts must be in chronological order, got {time} after {self._latest}")
+        self._latest = time
+        self._expire(time)
+
+        if exact_key in self._exact:
+            self.dropped += 1
+            return True
+
+        signature = get_signature()
+        band_keys = self._band_keys(signature)
+        for key in band_keys:
+            for other in self._buckets.get(key, ()):
+                if np.mean(signature == self._signatures[other]) >= self.threshold:
+                    self.dropped += 1
+                    return True
+
+        entry = self._next_id
+        self._next_id += 1
+        self._recent.append((time, entry, exact_key, band_keys))
+        self._signatures[entry] = signature
+        self._exact[exact_key] = self._exact.get(exact_key, 0) + 1
+        for key in band_keys:
+            self._buckets.setdefault(key, []).append(entry)
+        return False
+
+    def filter_frame(self, df, time_column='date', text_column='text'):
+        """Rows of a posts DataFrame that are not reposts, in their original order."""
+        times = pd.to_datetime(df[time_column], utc=True)
+        keep = [not self.is_duplicate(t, text) for t, text in zip(times, df[text_column])]
+        return df[keep]
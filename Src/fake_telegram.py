@@ -0,0 +1,58 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime
+from RawData import FloodWait
+
+
+@dataclass
+class FakeMessage:
+    id: int
+    date: datetime
+    text: str
+
+
+class FakeTelegramClient:
+    """Local stand-in for TelegramClient, for tests and benchmarks of RawData.fetch_channels.
+
+    ``channels`` maps a channel id to a list of (date, text) posts in
+    chronological order. ``latency`` simulates a network round-trip per page
+    of ``page_size`` messages and ``flood_every`` raises FloodWait once every
+    that many pages.
+    """
+
+    def __init__(self, channels, latency=0.0, page_size=100, flood_every=0, flood_seconds=0):
+        self.channels = {
+            channel_id: [FakeMessage(i + 1, date, text) for i, (date, text) in enumerate(posts)]
+            for channel_id, posts in channels.items()
+        }
+        self.latency = latency
+        self.page_size = page_size
+        self.flood_every = flood_every
+        self.flood_seconds = flood_seconds
+        self.pages = 0
+
+    async def start(self):
+        return self
+
+    async def disconnect(self):
+        pass
+
+    async def get_entity(self, channel_id):
+        if channel_id not in self.channels:
+            raise ValueError(f"Unknown channel {channel_id}")
+        return channel_id
+
+    async def iter_messages(self, channel, min_id=0, offset_date=None, reverse=False):
+        messages = [m for m in self.channels[channel] if m.id > min_id]
+        if offset_date is not None:
+            messages = [m for m in messages if m.date >= offset_date]
+        if not reverse:
+            messages.reverse()
+
+        for i, msg in enumerate(messages):
+            if i % self.page_size == 0:
+                self.pages += 1
+                if self.flood_every and self.pages % self.flood_every == 0:
+                    raise FloodWait(self.flood_seconds)
+                await asyncio.sleep(self.latency)
+            yield msg
@@ -1,27 +1,60 @@
+import os
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from visualizer import FoodMarketVisualizer
+import metrics
+from render_cache import RenderCache
+from live_data import LiveData
 
 st.set_page_config(page_title="Food Market Visualizer", layout="wide")
 st.title("\U0001F4CA Food Market Visualizer")
 
-# Load data
-@st.cache_data
-def load_data():
-    try:
-        demand_df = pd.read_csv("Data/DailyDemand.csv", encoding="utf-8-sig")
-        supply_df = pd.read_csv("Data/DailySellers.csv", encoding="utf-8-sig")
-        return demand_df, supply_df
-    except FileNotFoundError:
-        st.error("❌ Data files not found. Please check the 'Data/' folder.")
-        st.stop()
-    except Exception as e:
-        st.error(f"❌ Failed to load data: {e}")
-        st.stop()
-
-demand_df, supply_df = load_data()
-viz = FoodMarketVisualizer(demand_df, supply_df)
+# Months the pickers below can select; days outside them are never loaded
+YEAR, FIRST_MONTH, LAST_MONTH = 2025, 3, 8
+# Set to record the render.* stages and render cache hits of each session in one metrics file
+UI_METRICS_ENV = "FOOD_MARKET_UI_METRICS"
+
+# One data holder per server process, shared by every session and rerun.
+# It swaps in a new visualizer when the daily aggregates change on disk.
+@st.cache_resource
+def get_live_data():
+    return LiveData(cache=RenderCache(), start_date=datetime(YEAR, FIRST_MONTH, 1),
+                    end_date=pd.Timestamp(datetime(YEAR, LAST_MONTH, 1)) + pd.offsets.MonthEnd(1))
+
+try:
+    viz = get_live_data().current()
+except FileNotFoundError:
+    st.error("❌ Data files not found. Please check the 'Data/' folder.")
+    st.stop()
+except Exception as e:
+    st.error(f"❌ Failed to load data: {e}")
+    st.stop()
+demand_df = viz.demand_df
+
+
+def session_metrics():
+    """This session's metrics run, kept across reruns; None unless $FOOD_MARKET_UI_METRICS is set."""
+    if not os.environ.get(UI_METRICS_ENV):
+        return None
+    if 'metrics_run' not in st.session_state:
+        st.session_state.metrics_run = metrics.Run("ui")
+    return st.session_state.metrics_run
+
+
+def show_chart(plot, *args, **kwargs):
+    session_run = session_metrics()
+    if session_run is None:
+        png = plot(*args, **kwargs)
+    else:
+        with metrics.recording(session_run):
+            png = plot(*args, **kwargs)
+        # Rewrites the session's one file
+        session_run.save()
+    if png is None:
+        st.warning("⚠️ No data available for the selected period.")
+    else:
+        st.image(png)
+
 
 # UI controls
 chart_type = st.selectbox("Select Chart Type", [
@@ -32,11 +65,11 @@ chart_type = st.selectbox("Select Chart Type", [
     "Daily Comparison for Month"
 ])
 
-year = 2025
-start_month = st.number_input("Start Month", min_value=3, max_value=7, value=6, step=1)
+year = YEAR
+start_month = st.number_input("Start Month", min_value=FIRST_MONTH, max_value=LAST_MONTH - 1, value=6, step=1)
 
 if chart_type != "Daily Comparison for Month":
-    end_month = st.number_input("End Month", min_value=start_month, max_value=8, value=start_month, step=1)
+    end_month = st.number_input("End Month", min_value=start_month, max_value=LAST_MONTH, value=start_month, step=1)
     start_date = datetime(year, start_month, 1)
     end_date = pd.Timestamp(datetime(year, end_month, 1)) + pd.offsets.MonthEnd(1)
     st.markdown(f"**Date Range:** {start_date.date()} → {end_date.date()}")
@@ -51,8 +84,7 @@ if chart_type != "Correlation Matrix" and chart_type != "Total Food Percentages
 if chart_type == "Daily Demand vs Supply":
     if st.button("Generate Chart"):
         try:
-            viz.plot_daily(column, start_date=start_date, end_date=end_date)
-            st.image(f"visualizations/daily_{column}_{start_date.date()}_{end_date.date()}.png")
+            show_chart(viz.plot_daily, column, start_date=start_date, end_date=end_date)
         except KeyError:
             st.error("❌ Selected column does not exist in the data.")
         except ValueError as ve:
@@ -67,8 +99,7 @@ if chart_type == "Daily Demand vs Supply":
 elif chart_type == "Difference Between Demand and Supply":
     if st.button("Generate Chart"):
         try:
-            viz.plot_difference(column, start_date=start_date, end_date=end_date)
-            st.image(f"visualizations/difference_{column}_{start_date.date()}_{end_date.date()}.png")
+            show_chart(viz.plot_difference, column, start_date=start_date, end_date=end_date)
         except KeyError:
             st.error("❌ Selected column does not exist.")
         except ValueError:
@@ -83,8 +114,7 @@ elif chart_type == "Difference Between Demand and Supply":
 elif chart_type == "Total Food Percentages (Pie Chart)":
     if st.button("Generate Chart"):
         try:
-            viz.plot_total_food_percentages("Data/DailyDemand.csv", start_date=start_date, end_date=end_date)
-            st.image(f"visualizations/piechart_{start_date.date()}_{end_date.date()}.png")
+            show_chart(viz.plot_total_food_percentages, "Data/DailyDemand.csv", start_date=start_date, end_date=end_date)
         except FileNotFoundError:
             st.error("❌ CSV file not found.")
         except ValueError:
@@ -98,10 +128,13 @@ elif chart_type == "Total Food Percentages (Pie Chart)":
 
 elif chart_type == "Correlation Matrix":
     data_type = st.radio("Select Data Source", ["demand", "supply"], horizontal=True)
+    restrict = st.checkbox("Restrict to the selected date range", value=False)
     if st.button("Generate Chart"):
         try:
-            viz.plot_correlation_matrix(data_type=data_type)
-            st.image(f"visualizations/correlation_top10_{data_type}.png")
+            if restrict:
+                show_chart(viz.plot_correlation_matrix, data_type=data_type, start_date=start_date, end_date=end_date)
+            else:
+                show_chart(viz.plot_correlation_matrix, data_type=data_type)
         except ValueError:
             st.error("❌ Correlation calculation failed. Not enough numeric data.")
         except KeyError:
@@ -116,8 +149,7 @@ elif chart_type == "Correlation Matrix":
 elif chart_type == "Daily Comparison for Month":
     if st.button("Generate Chart"):
         try:
-            viz.plot_daily_comparison_bar_for_month(column, year=year, month=start_month)
-            st.image(f"visualizations/daily_bar_{column}_{year}_{start_month:02d}.png")
+            show_chart(viz.plot_daily_comparison_bar_for_month, column, year=year, month=start_month)
         except KeyError:
             st.error("❌ Column not found in data.")
         except ValueError:
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+from day_range import day_rows
+
+
+class GapPanel:
+    """Demand, supply and demand − supply for every item on one shared daily index.
+
+    Built once per data version with NumPy; days missing from one side are
+    NaN there, so the difference is only defined on days present in both
+    (the same days the old per-column ``pd.merge`` kept). Positive
+    differences are shortages, negative ones surpluses. A side that already
+    covers every day is kept as it is, so frames viewing memory-mapped
+    matrices (``daily_matrix``) are not copied, and differences are only
+    computed for the rows and items asked for.
+    """
+
+    def __init__(self, demand_df, supply_df):
+        demand_days = pd.to_datetime(demand_df['day']).values.astype('datetime64[ns]')
+        supply_days = pd.to_datetime(supply_df['day']).values.astype('datetime64[ns]')
+        self.items = [c for c in demand_df.columns if c != 'day' and c in supply_df.columns]
+        self.item_index = {item: i for i, item in enumerate(self.items)}
+        self.days = np.union1d(demand_days, supply_days)
+
+        self.demand = self._align(demand_df, demand_days)
+        self.supply = self._align(supply_df, supply_days)
+
+    def _align(self, df, days):
+        if np.array_equal(days, self.days):
+            return df[self.items].to_numpy(dtype=float)
+        values = np.full((len(self.days), len(self.items)), np.nan)
+        if len(days):
+            values[np.searchsorted(self.days, days)] = df[self.items].to_numpy(dtype=float)
+        return values
+
+    def bounds(self, start_date=None, end_date=None):
+        """Row slice covering the dates (inclusive), found by binary search on the index."""
+        return day_rows(self.days, start_date, end_date)
+
+    def difference(self, rows=slice(None), j=slice(None)):
+        """Demand − supply over a row slice, for one item index or all of them."""
+        return self.demand[rows, j] - self.supply[rows, j]
+
+    def _field(self, field, rows, j):
+        return self.difference(rows, j) if field == 'difference' else getattr(self, field)[rows, j]
+
+    def frame(self, item, start_date=None, end_date=None):
+        """Day, demand, supply and difference of one item over a date range."""
+        j = self.item_index[item]
+        rows = self.bounds(start_date, end_date)
+        return pd.DataFrame({
+            'day': self.days[rows],
+            'demand': self.demand[rows, j],
+            'supply': self.supply[rows, j],
+            'difference': self.difference(rows, j),
+        })
+
+    def rolling_mean(self, item, window, field='difference', start_date=None, end_date=None):
+        """Trailing mean over the last ``window`` calendar days, ignoring NaN (at least one value per window).
+
+        Days without data just fall out of the window, as in
+        ``series.rolling(f"{window}D", min_periods=1).mean()``.
+        """
+        j = self.item_index[item]
+        rows = self.bounds(start_date, end_date)
+        days = self.days[rows]
+        values = self._field(field, rows, j)
+        valid = ~np.isnan(values)
+        sums = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+        counts = np.concatenate(([0], np.cumsum(valid)))
+
+        end = np.arange(1, len(values) + 1)
+        start = np.searchsorted(days, days - np.timedelta64(window, 'D'), side='right')
+        n = counts[end] - counts[start]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(n > 0, (sums[end] - sums[start]) / n, np.nan)
+        return pd.Series(mean, index=days, name=f"{item}_{field}_mean{window}")
+
+    def streaks(self, item, start_date=None, end_date=None):
+        """Runs of consecutive calendar days of shortage (demand > supply) or surplus for one item.
+
+        A day missing from the index, or without both sides, ends a run.
+        """
+        j = self.item_index[item]
+        rows = self.bounds(start_date, end_date)
+        days = self.days[rows]
+        sign = np.sign(np.nan_to_num(self.difference(rows, j)))
+
+        # A run starts wherever the sign changes or the previous calendar day is missing
+        breaks = np.ones(len(sign), dtype=bool)
+        breaks[1:] = (sign[1:] != sign[:-1]) | (np.diff(days) != np.timedelta64(1, 'D'))
+        starts = np.flatnonzero(breaks)
+        ends = np.append(starts[1:], len(sign)) - 1
+        keep = sign[starts] != 0
+        starts, ends = starts[keep], ends[keep]
+        return pd.DataFrame({
+            'kind': np.where(sign[starts] > 0, 'shortage', 'surplus'),
+            'start': days[starts],
+            'end': days[ends],
+            'days': ends - starts + 1,
+        })
+
+    def rank_undersupplied(self, start_date=None, end_date=None, top_n=10):
+        """Items with the highest mean demand − supply gap over a date range."""
+        difference = self.difference(self.bounds(start_date, end_date))
+        n = np.sum(~np.isnan(difference), axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            gaps = np.where(n > 0, np.nansum(difference, axis=0) / n, np.nan)
+        ranking = pd.Series(gaps, index=self.items).dropna().sort_values(ascending=False)
+        return ranking.head(top_n)
@@ -0,0 +1,117 @@
+from collections import defaultdict
+from arabic_normalize import normalize_token, strip_article, article_stems, strip_conjunction, TokenTable
+
+
+class KeywordMatcher:
+    """Compiled keyword index for counting single- and multi-word items in one pass.
+
+    Keywords are compiled once into a hash index keyed by their first word.
+    Words are compared in normalized form (see ``arabic_normalize``), so
+    'السكر', 'سكّر' and 'سكر' are the same item; ``keywords`` may also map
+    each item to its other spellings ({'بطاطا': ['بطاطس']}). An article or
+    a joined 'و' is only stripped when what is left is a listed word, and a
+    joined 'و' only once the post has named an item ('زيت وسكر'), so a
+    name such as 'وتين' is not counted as 'تين'. Raw tokens go through a
+    memoized table, so each costs a single dict lookup however many
+    keywords or spellings exist. Multi-word items ('ورق عنب', 'جوز الهند')
+    are matched longest-first and consume their words, so 'ورق عنب' is not
+    also counted as 'عنب'.
+    """
+
+    def __init__(self, keywords, normalize=normalize_token):
+        if isinstance(keywords, dict):
+            spellings = {item.strip(): [item, *others] for item, others in keywords.items() if item.strip()}
+        else:
+            spellings = {}
+            for keyword in keywords:
+                if keyword.strip():
+                    spellings.setdefault(keyword.strip(), [keyword])
+        self.normalize = normalize
+        compiled = [(spelling.strip(), tuple(strip_article(normalize(word)) for word in spelling.split()), i)
+                    for i, item_spellings in enumerate(spellings.values()) for spelling in item_spellings]
+
+        # normalized phrase -> item index; the first item to claim a phrase keeps it
+        phrase_items = {}
+        for _, phrase, i in compiled:
+            phrase_items.setdefault(phrase, i)
+
+        # Items whose every spelling was claimed by an earlier one are merged away
+        used = sorted(set(phrase_items.values()))
+        renumber = {old: new for new, old in enumerate(used)}
+        names = list(spellings)
+        self.items = [names[i] for i in used]
+        self.index = {item: i for i, item in enumerate(self.items)}
+        # Every listed spelling also resolves to its canonical item
+        for spelling, phrase, _ in compiled:
+            self.index.setdefault(spelling, renumber[phrase_items[phrase]])
+
+        # first word -> [(remaining words, item index)], longest phrase first
+        phrases = defaultdict(list)
+        for words, i in phrase_items.items():
+            phrases[words[0]].append((words[1:], renumber[i]))
+        for candidates in phrases.values():
+            candidates.sort(key=lambda c: len(c[0]), reverse=True)
+        self._phrases = dict(phrases)
+        # raw token -> (normalized word, phrases starting with it or None,
+        #              phrases after a joined 'و' or None)
+        self.token_table = TokenTable(self._resolve, normalize)
+
+    def _resolve(self, word):
+        if word in self._phrases:
+            return word, self._phrases[word], None
+        for stem in article_stems(word):
+            if stem in self._phrases:
+                return stem, self._phrases[stem], None
+        # 'زيت وسكر': the conjunction is written joined to the next word
+        stem = strip_conjunction(word)
+        if stem is not None:
+            for stem in (stem, *article_stems(stem)):
+                if stem in self._phrases:
+                    return stem, None, self._phrases[stem]
+        return strip_article(word), None, None
+
+    def __len__(self):
+        return len(self.items)
+
+    def tokenize(self, text):
+        return text.split()
+
+    def iter_matches(self, text):
+        """Yield the item index of every keyword occurrence in the text."""
+        if not isinstance(text, str):
+            return
+        tokens = self.token_table
+        words = [tokens[word] for word in self.tokenize(text)]
+        i, n = 0, len(words)
+        listing = False
+        while i < n:
+            _, candidates, joined = words[i]
+            if candidates is None and listing:
+                candidates = joined
+            if candidates is None:
+                i += 1
+                continue
+            for rest, item in candidates:
+                end = i + 1 + len(rest)
+                if end <= n and all(words[i + 1 + k][0] == word for k, word in enumerate(rest)):
+                    yield item
+                    i = end
+                    listing = True
+                    break
+            else:
+                i += 1
+
+    def count(self, text, counts=None):
+        """Return the per-item count vector for one post.
+
+        Pass an existing vector as ``counts`` to accumulate into it in place.
+        """
+        if counts is None:
+            counts = [0] * len(self.items)
+        for item in self.iter_matches(text):
+            counts[item] += 1
+        return counts
+
+    def count_many(self, texts):
+        """Return one count vector per post."""
+        return [self.count(text) for text in texts]
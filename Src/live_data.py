@@ -0,0 +1,147 @@
+import os
+import time
+import threading
+import pandas as pd
+from sparse_daily import SparseDaily
+from storage import PartitionedStore, DAILY, DAILY_COLUMNS, dense_daily_frames
+from daily_matrix import DailyMatrix, matrix_path
+from visualizer import FoodMarketVisualizer, file_fingerprint
+
+DEMAND_CSV = os.path.join("Data", "DailyDemand.csv")
+SUPPLY_CSV = os.path.join("Data", "DailySellers.csv")
+
+
+class LiveData:
+    """The dashboard's current visualizer, refreshed when the daily aggregates change.
+
+    ``current()`` checks the data at most every ``check_interval`` seconds.
+    The store's daily matrices are preferred: they are memory-mapped, so a
+    reload only maps the new file, and the manifest names the data version
+    instead of a hash of every value. Otherwise the check lists the daily
+    partitions and stats their files; when a partition was added,
+    rewritten or removed, just that one is re-read and the rest come from
+    the previous load. Without a store, the daily CSVs are watched and
+    reloaded whole.
+
+    Whatever the source, the new visualizer keeps the previous correlation
+    statistics up to the first changed day and only sums the days after
+    it; the gap panel views the frames. It is built off to the side and
+    swapped in with a single assignment, so readers always see one
+    consistent version and never wait for a reload in progress. A reload
+    that fails (e.g. a partition removed by a running build while it was
+    listed) is reported and the previous version kept; it is tried again
+    at the next check.
+
+    Only the days between ``start_date`` and ``end_date`` (the range the
+    dashboard can show) are read and densified; partitions outside it are
+    not even listed for changes.
+    """
+
+    def __init__(self, store=None, demand_csv=DEMAND_CSV, supply_csv=SUPPLY_CSV, cache=None, check_interval=2.0,
+                 start_date=None, end_date=None):
+        self.store = store or PartitionedStore()
+        self.csv_paths = (demand_csv, supply_csv)
+        self.start_date = start_date
+        self.end_date = end_date
+        self.cache = cache
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked = 0.0
+        self._version = None
+        # label -> {part_dir: (stamp, DataFrame)} of the last load
+        self._days = {label: {} for label in DAILY}
+        self._viz = None
+        self.reloads = 0
+
+    def matrix_paths(self):
+        return [matrix_path(self.store, name) for name in DAILY.values()]
+
+    def uses_matrices(self):
+        return all(os.path.exists(path) for path in self.matrix_paths())
+
+    def uses_store(self):
+        return all(self.store.exists(name) for name in DAILY.values())
+
+    def fingerprint(self):
+        """Cheap version of the data: matrix manifest stats, partition stamps, or the CSV stats."""
+        if self.uses_matrices():
+            return tuple(file_fingerprint(*self.matrix_paths()))
+        if self.uses_store():
+            return tuple((label, part_dir, self.store.partition_stamp(part_dir))
+                         for label, name in DAILY.items() for _, part_dir in self._partitions(name))
+        return tuple(file_fingerprint(*self.csv_paths))
+
+    def current(self):
+        """The visualizer for the latest data, reloading first if the data changed."""
+        if self._viz is None or time.monotonic() - self._checked >= self.check_interval:
+            try:
+                self.refresh(wait=self._viz is None)
+            except Exception as e:
+                if self._viz is None:
+                    raise
+                print(f" Reload failed, still showing the previous data: {e!r}")
+        return self._viz
+
+    def refresh(self, wait=True):
+        """Reload if the data changed; returns True when a new visualizer was swapped in."""
+        if not self._lock.acquire(blocking=wait):
+            return False  # another session is already reloading
+        try:
+            self._checked = time.monotonic()
+            version = self.fingerprint()
+            if version == self._version and self._viz is not None:
+                return False
+            data_version = None
+            if self.uses_matrices():
+                demand_df, supply_df, data_version = self._load_matrices()
+            elif self.uses_store():
+                demand_df, supply_df = self._load_store()
+            else:
+                demand_df, supply_df = self._load_csv()
+            if self._viz is None:
+                viz = FoodMarketVisualizer(demand_df, supply_df, cache=self.cache, data_version=data_version)
+            else:
+                viz = self._viz.updated(demand_df, supply_df, data_version)
+            # Derived data is built before the swap, not on the first chart after it
+            viz.gap_panel
+            viz.correlation_stats
+            self._viz, self._version = viz, version
+            self.reloads += 1
+            return True
+        finally:
+            self._lock.release()
+
+    def _partitions(self, name):
+        return self.store.partitions(name, self.start_date, self.end_date)
+
+    def _load_matrices(self):
+        """(demand frame, supply frame, data version) of the range, viewing the mapped matrices."""
+        demand, supply = (DailyMatrix.load(path) for path in self.matrix_paths())
+        data_version = repr((demand.values_file, supply.values_file, str(self.start_date), str(self.end_date)))
+        return demand.frame(self.start_date, self.end_date), supply.frame(self.start_date, self.end_date), data_version
+
+    def _load_store(self):
+        sparse = {}
+        for label, name in DAILY.items():
+            previous, loaded = self._days[label], {}
+            for _, part_dir in self._partitions(name):
+                stamp = self.store.partition_stamp(part_dir)
+                cached = previous.get(part_dir)
+                if cached is None or cached[0] != stamp:
+                    df = self.store.read_partition(part_dir, DAILY_COLUMNS)
+                    if df is None:
+                        continue
+                    cached = (stamp, df)
+                loaded[part_dir] = cached
+            self._days[label] = loaded
+            frames = [df for _, df in loaded.values()]
+            sparse[label] = SparseDaily.from_frame(
+                pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=DAILY_COLUMNS))
+        return dense_daily_frames(sparse['demand'], sparse['supply'], self.start_date, self.end_date)
+
+    def _load_csv(self):
+        frames = []
+        for path in self.csv_paths:
+            df = FoodMarketVisualizer.by_day(pd.read_csv(path, encoding="utf-8-sig"))
+            frames.append(FoodMarketVisualizer.between(df, self.start_date, self.end_date).reset_index(drop=True))
+        return tuple(frames)
@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import sys
+import cProfile
+import itertools
+import contextvars
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+try:
+    import resource
+except ImportError:
+    # Windows has no resource module; peak memory is then not recorded
+    resource = None
+
+METRICS_DIR = os.path.join("Data", "metrics")
+# Comma-separated stage names (or prefixes such as "render") to profile with cProfile
+PROFILE_ENV = "FOOD_MARKET_PROFILE"
+METRICS_DIR_ENV = "FOOD_MARKET_METRICS_DIR"
+
+_current_run = contextvars.ContextVar("metrics_run", default=None)
+# Numbers the runs of this process, so two started in the same clock tick get different file names
+_run_ids = itertools.count()
+
+# Linux only: the peak since the last reset, and the file that resets it
+_STATUS = "/proc/self/status"
+_CLEAR_REFS = "/proc/self/clear_refs"
+
+
+def _peak_rss_mb():
+    """Peak resident memory since the last reset (VmHWM), else the process peak, else None."""
+    if os.path.exists(_STATUS):
+        with open(_STATUS) as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _reset_peak_rss():
+    if not os.path.exists(_CLEAR_REFS):
+        return
+    try:
+        with open(_CLEAR_REFS, "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _cache_counts(cache):
+    return cache.hits, cache.misses
+
+
+class Run:
+    """Metrics of one pipeline run, written as a single JSON file.
+
+    Stages are recorded with ``stage()``; repeated stages with the same
+    name (one per chart, per chunk) are summed into one entry. Each entry
+    has its calls, wall time, rows in/out, rows per second, peak resident
+    memory (None where the platform cannot tell) and the hit rate of every
+    cache passed in. The peak is reset when an outermost stage starts, so a
+    nested stage reports the highest since its outermost stage began.
+    Stages recorded in pool workers are added with ``merge()``; their
+    seconds add up across workers. Stages whose name
+    matches ``$FOOD_MARKET_PROFILE`` are also profiled with cProfile, one
+    profile per stage name over all its calls, dumped next to the metrics
+    as a .prof file when the run is saved (view it with
+    ``python -m pstats``, snakeviz or flameprof).
+    """
+
+    def __init__(self, name, metrics_dir=None, profile=None):
+        self.name = name
+        self.metrics_dir = metrics_dir or os.environ.get(METRICS_DIR_ENV, METRICS_DIR)
+        if profile is None:
+            profile = [s.strip() for s in os.environ.get(PROFILE_ENV, "").split(",") if s.strip()]
+        self.profile = list(profile)
+        self.started = datetime.now(timezone.utc)
+        # File name stem, unique across processes and across runs of one process
+        self.stem = f"{name}-{self.started:%Y%m%dT%H%M%S.%f}-{os.getpid()}-{next(_run_ids)}"
+        self.stages = {}
+        self._active = []
+        self._profiler = None
+        self._profilers = {}
+
+    def _profiles(self, name):
+        return any(name == p or name.startswith(p + ".") for p in self.profile)
+
+    @contextmanager
+    def stage(self, name, rows_in=None, caches=None):
+        """Record the block as a stage; set ``record['rows_in']`` / ``record['rows_out']`` inside if not known up front."""
+        record = {'rows_in': rows_in, 'rows_out': None}
+        caches = caches or {}
+        before = {label: _cache_counts(cache) for label, cache in caches.items()}
+
+        if not self._active:
+            _reset_peak_rss()
+        self._active.append(name)
+
+        profiler = None
+        if self._profiler is None and self._profiles(name):
+            profiler = self._profiler = self._profilers.setdefault(name, cProfile.Profile())
+            profiler.enable()
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            seconds = time.perf_counter() - started
+            if profiler is not None:
+                profiler.disable()
+                self._profiler = None
+            # Nothing resets the peak inside an outermost stage, so the reading at the end covers the block
+            peak = _peak_rss_mb()
+            self._active.pop()
+
+            caches_seen = {}
+            for label, cache in caches.items():
+                hits, misses = _cache_counts(cache)
+                caches_seen[label] = {'hits': hits - before[label][0], 'misses': misses - before[label][1]}
+            self._add(name, {
+                'calls': 1, 'seconds': seconds, 'rows_in': record['rows_in'], 'rows_out': record['rows_out'],
+                'peak_rss_mb': peak, 'caches': caches_seen,
+            })
+
+    def _add(self, name, other):
+        entry = self.stages.setdefault(name, {
+            'calls': 0, 'seconds': 0.0, 'rows_in': None, 'rows_out': None, 'peak_rss_mb': None, 'caches': {},
+        })
+        entry['calls'] += other['calls']
+        entry['seconds'] += other['seconds']
+        for key in ('rows_in', 'rows_out'):
+            if other[key] is not None:
+                entry[key] = (entry[key] or 0) + other[key]
+        if other['peak_rss_mb'] is not None:
+            entry['peak_rss_mb'] = max(entry['peak_rss_mb'] or 0.0, other['peak_rss_mb'])
+        for label, seen in other['caches'].items():
+            counts = entry['caches'].setdefault(label, {'hits': 0, 'misses': 0})
+            counts['hits'] += seen['hits']
+            counts['misses'] += seen['misses']
+        for path in other.get('profiles', []):
+            if path not in entry.setdefault('profiles', []):
+                entry['profiles'].append(path)
+
+    def merge(self, stages):
+        """Add the stage entries of another Run (``Run.stages``), e.g. one recorded in a pool worker."""
+        for name, other in stages.items():
+            self._add(name, other)
+
+    def _dump_profiles(self):
+        """Write each stage's profile so far; a later dump overwrites the same file with the grown profile."""
+        for name, profiler in self._profilers.items():
+            os.makedirs(self.metrics_dir, exist_ok=True)
+            path = os.path.join(self.metrics_dir, f"{self.stem}-{name}.prof")
+            profiler.dump_stats(path)
+            self._add(name, {'calls': 0, 'seconds': 0.0, 'rows_in': None, 'rows_out': None,
+                             'peak_rss_mb': None, 'caches': {}, 'profiles': [path]})
+
+    def summary(self):
+        stages = {}
+        for name, entry in self.stages.items():
+            entry = dict(entry, caches={label: dict(counts) for label, counts in entry['caches'].items()})
+            rows = entry['rows_in'] if entry['rows_in'] is not None else entry['rows_out']
+            entry['rows_per_s'] = rows / entry['seconds'] if rows is not None and entry['seconds'] else None
+            for counts in entry['caches'].values():
+                lookups = counts['hits'] + counts['misses']
+                counts['hit_rate'] = counts['hits'] / lookups if lookups else None
+            stages[name] = entry
+        return {
+            'run': self.name,
+            'started': self.started.isoformat(timespec='seconds'),
+            'seconds': (datetime.now(timezone.utc) - self.started).total_seconds(),
+            'pid': os.getpid(),
+            'stages': stages,
+        }
+
+    def save(self):
+        """Write the summary (and profiles) to this run's file; saving again rewrites the same file."""
+        self._dump_profiles()
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        path = os.path.join(self.metrics_dir, f"{self.stem}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+        return path
+
+
+@contextmanager
+def recording(current):
+    """Make an existing Run the active one inside the block, e.g. one kept for a whole dashboard session."""
+    token = _current_run.set(current)
+    try:
+        yield current
+    finally:
+        _current_run.reset(token)
+
+
+@contextmanager
+def run(name, metrics_dir=None, profile=None):
+    """Collect the stages recorded inside the block into one Run and save it as JSON at the end."""
+    current = Run(name, metrics_dir, profile)
+    try:
+        with recording(current):
+            yield current
+    finally:
+        print(f" Metrics saved to {current.save()}")
+
+
+@contextmanager
+def capture(name="worker"):
+    """Collect the stages recorded inside the block into a Run that is not saved.
+
+    Meant for pool workers: return ``run.stages`` with the result and hand
+    them to ``merge`` in the parent process. Profiles are dumped when the
+    block ends and listed in the stages.
+    """
+    current = Run(name)
+    try:
+        with recording(current):
+            yield current
+    finally:
+        current._dump_profiles()
+
+
+def merge(stages):
+    """``Run.merge`` on the active run; outside a run the stages are dropped."""
+    current = _current_run.get()
+    if current is not None:
+        current.merge(stages)
+
+
+def current_run():
+    return _current_run.get()
+
+
+def stage(name, rows_in=None, caches=None):
+    """``Run.stage`` on the active run; outside a run the block just runs, with a throwaway record."""
+    current = _current_run.get()
+    if current is None:
+        return nullcontext({'rows_in': rows_in, 'rows_out': None})
+    return current.stage(name, rows_in, caches)
@@ -0,0 +1,135 @@
+import os
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import metrics
+from storage import PartitionedStore, DAILY
+from daily_matrix import DailyMatrix, matrix_path
+
+DEMAND_CSV = os.path.join("Data", "DailyDemand.csv")
+SUPPLY_CSV = os.path.join("Data", "DailySellers.csv")
+REPORTS_DIR = os.path.join("visualizations", "reports")
+CHARTS = ("daily", "difference", "bar")
+
+# Per-worker visualizer, built once by the pool initializer
+_viz = None
+
+
+def _init_worker(demand_csv, supply_csv, store_root=None):
+    global _viz
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    from visualizer import FoodMarketVisualizer
+    if store_root is not None:
+        # Every worker maps the same matrix files instead of parsing its own copy
+        _viz = FoodMarketVisualizer.from_matrices(PartitionedStore(store_root))
+        return
+    demand_df = pd.read_csv(demand_csv, encoding="utf-8-sig")
+    supply_df = pd.read_csv(supply_csv, encoding="utf-8-sig")
+    _viz = FoodMarketVisualizer(demand_df, supply_df)
+
+
+def _render(job):
+    """Render one (chart, item, month, path) job in a worker; returns (job, status, stages recorded)."""
+    with metrics.capture() as run:
+        status = _render_job(job)
+    return job, status, run.stages
+
+
+def _render_job(job):
+    chart, item, month, path = job
+    start_date = month.to_timestamp()
+    end_date = month.to_timestamp(how='end').normalize()
+    try:
+        if chart == "daily":
+            png = _viz.plot_daily(item, start_date=start_date, end_date=end_date)
+        elif chart == "difference":
+            png = _viz.plot_difference(item, start_date=start_date, end_date=end_date)
+        else:
+            png = _viz.plot_daily_comparison_bar_for_month(item, year=month.year, month=month.month)
+    except Exception as e:
+        return f"failed: {e!r}"
+    if png is None:
+        return "empty"
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(png)
+    os.replace(tmp_path, path)
+    return "rendered"
+
+
+def report_path(out_dir, chart, item, month):
+    return os.path.join(out_dir, f"{chart}_{item}_{month}.png")
+
+
+def plan_jobs(charts, items, months, out_dir, data_mtime, force=False):
+    """Split the chart × item × month matrix into jobs to render and outputs already up to date."""
+    jobs, fresh = [], []
+    for chart, item, month in itertools.product(charts, items, months):
+        path = report_path(out_dir, chart, item, month)
+        if not force and os.path.exists(path) and os.path.getmtime(path) >= data_mtime:
+            fresh.append(path)
+        else:
+            jobs.append((chart, item, month, path))
+    return jobs, fresh
+
+
+def prerender(charts=CHARTS, items=None, months=None, workers=None, out_dir=REPORTS_DIR,
+              demand_csv=DEMAND_CSV, supply_csv=SUPPLY_CSV, force=False, store=None):
+    """Render the matrix from the store's daily matrices when they exist, otherwise from the daily CSVs."""
+    store = store or PartitionedStore()
+    data_paths = [matrix_path(store, name) for name in DAILY.values()]
+    if all(os.path.exists(path) for path in data_paths):
+        demand = DailyMatrix.load(data_paths[0])
+        all_items, days, store_root = demand.items, pd.DatetimeIndex(demand.days), store.root
+    else:
+        data_paths = [demand_csv, supply_csv]
+        demand_df = pd.read_csv(demand_csv, encoding="utf-8-sig")
+        all_items, days, store_root = list(demand_df.columns[1:]), pd.DatetimeIndex(demand_df['day']), None
+    items = items or all_items
+    if not months:
+        months = sorted(days.to_period('M').unique())
+    months = [pd.Period(m, freq='M') for m in months]
+    os.makedirs(out_dir, exist_ok=True)
+
+    data_mtime = max(os.path.getmtime(path) for path in data_paths)
+    jobs, fresh = plan_jobs(charts, items, months, out_dir, data_mtime, force)
+
+    workers = workers or os.cpu_count()
+    started = time.perf_counter()
+    statuses = {}
+    with metrics.stage("prerender.render", rows_in=len(jobs)) as record:
+        if jobs:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(demand_csv, supply_csv, store_root)) as pool:
+                chunksize = max(1, len(jobs) // (workers * 4))
+                for job, status, stages in pool.map(_render, jobs, chunksize=chunksize):
+                    # The workers' render.* stages, summed over every worker
+                    metrics.merge(stages)
+                    kind = status.split(":")[0]
+                    statuses[kind] = statuses.get(kind, 0) + 1
+                    if kind == "failed":
+                        print(f" {job[0]} {job[1]} {job[2]}: {status}")
+        record['rows_out'] = statuses.get("rendered", 0)
+    elapsed = time.perf_counter() - started
+
+    rendered = statuses.get("rendered", 0)
+    print(f" {len(jobs) + len(fresh)} charts: {rendered} rendered, {len(fresh)} up to date, "
+          f"{statuses.get('empty', 0)} without data, {statuses.get('failed', 0)} failed")
+    print(f" {elapsed:.1f}s with {workers} workers ({rendered / elapsed if elapsed else 0:.1f} charts/s)")
+    return statuses
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the chart × item × month report matrix in parallel")
+    parser.add_argument("--charts", nargs="+", choices=CHARTS, default=list(CHARTS))
+    parser.add_argument("--items", nargs="+", help="food columns (default: all)")
+    parser.add_argument("--months", nargs="+", help="months as YYYY-MM (default: every month in the data)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: number of cores)")
+    parser.add_argument("--out", default=REPORTS_DIR, help=f"output directory (default {REPORTS_DIR})")
+    parser.add_argument("--force", action="store_true", help="re-render outputs that are already up to date")
+    args = parser.parse_args()
+
+    with metrics.run("prerender"):
+        prerender(args.charts, args.items, args.months, args.workers, args.out, force=args.force)
@@ -0,0 +1,127 @@
+import functools
+import numpy as np
+import pandas as pd
+from day_range import day_rows
+
+
+def smallest_uint(max_value):
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if max_value <= np.iinfo(dtype).max:
+            return dtype
+    return np.uint64
+
+
+class SparseDaily:
+    """Daily item counts stored as (day, item, count) entries for non-zero cells only.
+
+    Items are categorical codes into ``items`` and counts use the smallest
+    unsigned type that fits, so size grows with the mentions actually seen,
+    not with items × days. ``to_dense`` materializes just the slice a chart
+    asks for.
+    """
+
+    def __init__(self, days, item_codes, counts, items):
+        days = np.asarray(days, dtype='datetime64[D]')
+        item_codes = np.asarray(item_codes)
+        counts = np.asarray(counts)
+        keep = counts > 0
+        order = np.lexsort((item_codes[keep], days[keep]))
+
+        self.items = list(items)
+        self.days = days[keep][order]
+        self.item_codes = item_codes[keep][order].astype(smallest_uint(max(len(self.items) - 1, 0)))
+        self.counts = counts[keep][order].astype(smallest_uint(counts.max() if len(counts) else 0))
+
+    @classmethod
+    def from_day_counts(cls, day_counts, items):
+        """From {day: count vector aligned with items}."""
+        days, codes, counts = [], [], []
+        for day, vector in day_counts.items():
+            for code, count in enumerate(vector):
+                if count:
+                    days.append(day)
+                    codes.append(code)
+                    counts.append(count)
+        return cls(np.array(days, dtype='datetime64[D]'), np.array(codes, dtype=np.int64),
+                   np.array(counts, dtype=np.int64), items)
+
+    @classmethod
+    def from_frame(cls, df, items=None):
+        """From a long DataFrame with day, item and count columns."""
+        item_values = df['item']
+        if items is None:
+            if isinstance(item_values.dtype, pd.CategoricalDtype):
+                items = list(item_values.cat.categories)
+            else:
+                items = list(dict.fromkeys(item_values))
+        codes = pd.Categorical(item_values, categories=items).codes
+        if (codes < 0).any():
+            raise KeyError(f"Unknown items: {sorted(set(item_values[codes < 0]))}")
+        days = pd.to_datetime(df['day']).values.astype('datetime64[D]')
+        return cls(days, codes.astype(np.int64), df['count'].to_numpy(dtype=np.int64), items)
+
+    def __len__(self):
+        return len(self.counts)
+
+    @functools.cached_property
+    def item_index(self):
+        return {item: i for i, item in enumerate(self.items)}
+
+    def to_frame(self):
+        """Long DataFrame (day, item, count) with a categorical item column."""
+        return pd.DataFrame({
+            'day': self.days.astype('datetime64[ns]'),
+            'item': pd.Categorical.from_codes(self.item_codes.astype(np.int64), categories=self.items),
+            'count': self.counts,
+        })
+
+    def to_day_counts(self):
+        """{date: count list aligned with ``items``}, as the aggregation step builds them."""
+        dense = self.to_dense(items=self.items)
+        return {day.date(): row.tolist() for day, row in zip(dense['day'], dense[self.items].to_numpy())}
+
+    def save(self, path):
+        self.to_frame().to_parquet(path, index=False)
+
+    @classmethod
+    def load(cls, path):
+        return cls.from_frame(pd.read_parquet(path))
+
+    def slice(self, start_date=None, end_date=None):
+        """Entries between two dates (inclusive), found by binary search on the sorted days."""
+        rows = day_rows(self.days, start_date, end_date)
+        part = object.__new__(SparseDaily)
+        part.items = self.items
+        part.days, part.item_codes, part.counts = self.days[rows], self.item_codes[rows], self.counts[rows]
+        return part
+
+    def present_items(self):
+        """Items with at least one mention, in ``items`` order."""
+        return [self.items[code] for code in np.unique(self.item_codes)]
+
+    def to_dense(self, start_date=None, end_date=None, items=None, percent=False):
+        """Day × item DataFrame for a date range and item subset.
+
+        Only days with mentions become rows. With ``percent=True`` each row
+        is the share of every item in that day's total, rounded like the
+        daily CSVs.
+        """
+        part = self.slice(start_date, end_date)
+        items = list(items) if items is not None else part.present_items()
+        columns = np.full(len(self.items), -1)
+        columns[[self.item_index[item] for item in items]] = np.arange(len(items))
+
+        days, rows = np.unique(part.days, return_inverse=True)
+        dense = np.zeros((len(days), len(items)), dtype=np.int64)
+        totals = np.zeros(len(days), dtype=np.int64)
+        np.add.at(totals, rows, part.counts)
+        selected = columns[part.item_codes] >= 0
+        np.add.at(dense, (rows[selected], columns[part.item_codes[selected]]), part.counts[selected])
+
+        if percent:
+            values = np.round(dense / np.maximum(totals, 1)[:, None] * 100, 2)
+        else:
+            values = dense
+        df = pd.DataFrame(values, columns=items)
+        df.insert(0, 'day', days.astype('datetime64[ns]'))
+        return df
@@ -0,0 +1,243 @@
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sparse_daily import SparseDaily
+
+DATA_DIR = "Data"
+STORE_DIR = os.path.join(DATA_DIR, "store")
+
+# Dataset names used by the pipeline
+RAW = "raw"
+RAW_COLUMNS = ["id", "channel", "date", "text"]
+CLASSIFIED = "classified"
+DAILY = {'demand': "daily_demand", 'supply': "daily_supply"}
+# Datasets partitioned by month: a day of item counts is a few hundred bytes, too little for a file of its own
+MONTHLY = frozenset(DAILY.values())
+DAILY_COLUMNS = ['day', 'item', 'count']
+# Partitions read per call by PartitionedStore.iter_partitions
+READ_BATCH = 32
+
+
+class PartitionedStore:
+    """Parquet datasets partitioned by day: <root>/<dataset>/day=YYYY-MM-DD/part-NNNNN.parquet.
+
+    The small daily aggregate datasets (``MONTHLY``) are partitioned by
+    month instead: <root>/<dataset>/month=YYYY-MM/. Date-range reads only
+    open the partitions overlapping the range, and columns keep their types
+    (datetime ``day``/``date``, booleans, floats), so nothing is re-parsed
+    from text.
+    """
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+
+    def dataset_dir(self, name):
+        return os.path.join(self.root, name)
+
+    def exists(self, name):
+        return os.path.isdir(self.dataset_dir(name))
+
+    @staticmethod
+    def _days(df):
+        if 'day' in df.columns:
+            return pd.to_datetime(df['day']).dt.normalize()
+        return pd.to_datetime(df['date'], utc=True).dt.tz_localize(None).dt.normalize()
+
+    @staticmethod
+    def _in_range(df, start_date=None, end_date=None):
+        days = PartitionedStore._days(df)
+        mask = pd.Series(True, index=df.index)
+        if start_date is not None:
+            mask &= days >= pd.Timestamp(start_date).normalize()
+        if end_date is not None:
+            mask &= days <= pd.Timestamp(end_date).normalize()
+        return mask
+
+    def write(self, name, df, mode="append"):
+        """Write a DataFrame into its day (or month) partitions.
+
+        ``mode="append"`` adds a new part file to each partition;
+        ``mode="overwrite"`` replaces the partitions present in ``df``.
+        The frame is converted to Arrow once and each partition writes a
+        slice of it, so many small days cost little more than one big one.
+        """
+        if df.empty:
+            return 0
+        df = df.copy()
+        if 'day' in df.columns:
+            df['day'] = pd.to_datetime(df['day'])
+        if 'date' in df.columns:
+            df['date'] = pd.to_datetime(df['date'], utc=True)
+
+        days = self._days(df).to_numpy()
+        order = np.argsort(days, kind='stable')
+        keys = days[order].astype('datetime64[M]' if name in MONTHLY else 'datetime64[D]')
+        table = pa.Table.from_pandas(df.iloc[order], preserve_index=False)
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        for start, stop in zip(starts, np.r_[starts[1:], len(keys)]):
+            prefix = "month" if name in MONTHLY else "day"
+            part_dir = os.path.join(self.dataset_dir(name), f"{prefix}={keys[start]}")
+            if mode == "overwrite" and os.path.isdir(part_dir):
+                shutil.rmtree(part_dir)
+            os.makedirs(part_dir, exist_ok=True)
+            n = len(os.listdir(part_dir))
+            pq.write_table(table.slice(start, stop - start), os.path.join(part_dir, f"part-{n:05d}.parquet"))
+        return len(df)
+
+    def replace(self, name, df, start_date=None, end_date=None):
+        """Make ``df`` the only rows of a date range (inclusive), or of the whole dataset without dates.
+
+        Partitions in the range that ``df`` has no rows for are removed too;
+        rows of a month partition that fall outside the range are kept.
+        """
+        kept = []
+        for _, part_dir in self.partitions(name, start_date, end_date):
+            if os.path.basename(part_dir).startswith("month=") and (start_date is not None or end_date is not None):
+                part = self.read_partition(part_dir)
+                if part is not None:
+                    kept.append(part[~self._in_range(part, start_date, end_date)])
+            shutil.rmtree(part_dir)
+        frames = [frame for frame in kept + [df] if not frame.empty]
+        if not frames:
+            return 0
+        return self.write(name, frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True))
+
+    def drop_rows(self, name, predicate, start_date=None, end_date=None):
+        """Remove the rows where ``predicate(df)`` is True from the partitions in a date range; returns the count."""
+        dropped = 0
+        for _, part_dir in self.partitions(name, start_date, end_date):
+            df = self.read_partition(part_dir)
+            if df is None:
+                continue
+            mask = predicate(df)
+            if not mask.any():
+                continue
+            dropped += int(mask.sum())
+            shutil.rmtree(part_dir)
+            if not mask.all():
+                self.write(name, df[~mask], mode="overwrite")
+        return dropped
+
+    def partitions(self, name, start_date=None, end_date=None):
+        """(first day, directory) of every partition overlapping the date range, in day order."""
+        root = self.dataset_dir(name)
+        if not os.path.isdir(root):
+            return []
+        start = pd.Timestamp(start_date).normalize() if start_date is not None else None
+        end = pd.Timestamp(end_date).normalize() if end_date is not None else None
+
+        selected = []
+        for entry in sorted(os.listdir(root)):
+            if entry.startswith("day="):
+                first = last = pd.Timestamp(entry[4:])
+            elif entry.startswith("month="):
+                first = pd.Timestamp(entry[6:])
+                last = first + pd.offsets.MonthEnd(0)
+            else:
+                continue
+            # Pruned by directory name, so files outside the range are never opened
+            if (start is None or last >= start) and (end is None or first <= end):
+                selected.append((first, os.path.join(root, entry)))
+        return selected
+
+    def partition_files(self, part_dir):
+        return [os.path.join(part_dir, f) for f in sorted(os.listdir(part_dir)) if f.endswith(".parquet")]
+
+    def partition_stamp(self, part_dir):
+        """(file, mtime, size) of every file in a partition; changes whenever the partition is rewritten."""
+        stamps = []
+        for path in self.partition_files(part_dir):
+            stat = os.stat(path)
+            stamps.append((os.path.basename(path), stat.st_mtime_ns, stat.st_size))
+        return tuple(stamps)
+
+    def read_partition(self, part_dir, columns=None):
+        """One partition as a DataFrame, or None when it holds no files."""
+        frames = [pd.read_parquet(path, columns=columns) for path in self.partition_files(part_dir)]
+        if not frames:
+            return None
+        return pd.concat(frames, ignore_index=True)
+
+    def iter_partitions(self, name, start_date=None, end_date=None, columns=None):
+        """Yield (day, DataFrame) one partition at a time; month partitions only keep the rows in range.
+
+        Partitions are read ``READ_BATCH`` at a time in a single call, which
+        costs far less than one read per small file, and split again by the
+        row counts of their files.
+        """
+        selected = self.partitions(name, start_date, end_date)
+        for i in range(0, len(selected), READ_BATCH):
+            group = [(day, part_dir, self.partition_files(part_dir)) for day, part_dir in selected[i:i + READ_BATCH]]
+            group = [(day, part_dir, files) for day, part_dir, files in group if files]
+            if not group:
+                continue
+            try:
+                # No hive partitioning: the day=/month= directory names are not added as a column
+                df = pd.read_parquet([path for _, _, files in group for path in files], columns=columns,
+                                     partitioning=None)
+                parts, start = [], 0
+                for _, _, files in group:
+                    stop = start + sum(pq.read_metadata(path).num_rows for path in files)
+                    parts.append(df.iloc[start:stop].reset_index(drop=True))
+                    start = stop
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                # Files whose schemas cannot be unified (e.g. an all-null column) are read one by one
+                parts = [pd.concat([pd.read_parquet(path, columns=columns) for path in files], ignore_index=True)
+                         for _, _, files in group]
+            for (day, part_dir, _), part in zip(group, parts):
+                if (os.path.basename(part_dir).startswith("month=") and 'day' in part.columns
+                        and (start_date is not None or end_date is not None)):
+                    part = part[self._in_range(part, start_date, end_date)].reset_index(drop=True)
+                yield day, part
+
+    def read(self, name, start_date=None, end_date=None, columns=None):
+        frames = [df for _, df in self.iter_partitions(name, start_date, end_date, columns)]
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True)
+
+    def export_csv(self, name, csv_path, start_date=None, end_date=None, columns=None):
+        """Write a dataset (or a date range of it) to the legacy UTF-8-sig CSV layout."""
+        df = self.read(name, start_date, end_date, columns)
+        if 'day' in df.columns:
+            df['day'] = pd.to_datetime(df['day']).dt.date
+        df.to_csv(csv_path, index=False, encoding="utf-8-sig")
+        return len(df)
+
+
+def load_daily_frames(store=None, start_date=None, end_date=None, items=None):
+    """Dense daily percentage frames (demand, supply) for a date range of the sparse daily datasets.
+
+    Only the partitions overlapping the range are read. Both frames get
+    the same columns: ``items``, or else the items mentioned on either side
+    in that range.
+    """
+    store = store or PartitionedStore()
+    demand = SparseDaily.from_frame(store.read(DAILY['demand'], start_date, end_date, DAILY_COLUMNS))
+    supply = SparseDaily.from_frame(store.read(DAILY['supply'], start_date, end_date, DAILY_COLUMNS))
+    return dense_daily_frames(demand, supply, start_date, end_date, items)
+
+
+def dense_daily_frames(demand, supply, start_date=None, end_date=None, items=None):
+    """Percentage frames of two SparseDaily objects for a date range and item subset.
+
+    Without ``items``, the columns are the items mentioned on either side
+    in the range; only that slice is ever densified.
+    """
+    if items is None:
+        demand_part, supply_part = demand.slice(start_date, end_date), supply.slice(start_date, end_date)
+        mentioned = set(demand_part.present_items()) | set(supply_part.present_items())
+        items = [item for item in demand.items if item in mentioned]
+        items += [item for item in supply.items if item in mentioned and item not in items]
+    return (_dense_percent(demand, start_date, end_date, items),
+            _dense_percent(supply, start_date, end_date, items))
+
+
+def _dense_percent(sparse, start_date, end_date, items):
+    # Items unknown to one side (e.g. only ever sold) are all-zero columns there
+    known = [item for item in items if item in sparse.item_index]
+    df = sparse.to_dense(start_date, end_date, items=known, percent=True)
+    return df.reindex(columns=['day', *items], fill_value=0.0)
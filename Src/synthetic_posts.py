@@ -0,0 +1,133 @@
+import random
+import itertools
+from collections import deque
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+from Daily_Data_percntage import food_items
+from storage import RAW, RAW_COLUMNS
+
+# Phrasing that the demand/supply rules in MarketPosts.DEFAULT_RULES pick up
+DEMAND_TEMPLATES = [
+    "مطلوب {items} {qty}",
+    "مطلوب {items} بسعر مناسب ضمن المخيم",
+    "مين عنده {items}؟ مطلوب ضروري",
+    "مطلوب بشكل عاجل {items} للعائلة",
+    "يا جماعة مطلوب {items} {qty} والدفع فوري",
+]
+SUPPLY_TEMPLATES = [
+    "متوفر {items} {qty} بسعر {price} شيكل",
+    "للبيع {items} {qty} السعر {price}",
+    "موجود عنا {items} والتوصيل لحد البيت",
+    "متوفر حاليا {items} بكميات محدودة",
+    "للبيع بسعر الجملة {items} {qty}",
+]
+BOTH_TEMPLATES = [
+    "مطلوب {items} ومتوفر عندي {other} للبدل",
+    "للبيع {other} {qty} ومطلوب {items}",
+]
+OTHER_TEMPLATES = [
+    "صباح الخير للجميع",
+    "الرجاء الالتزام بقوانين المجموعة وعدم نشر الروابط",
+    "انقطاع المياه في الحي الشرقي حتى المساء",
+    "هل فتحت نقطة التوزيع اليوم؟",
+    "شكرا لكل من ساعد",
+]
+QUANTITIES = ["كيلو", "٢ كيلو", "نص كيلو", "كيس", "شوال", "كرتونة", "علبة", "ربطة"]
+EDITS = [" ‼️", " 📞", " للتواصل خاص", " .", " السعر قابل للتفاوض"]
+
+
+class SyntheticPosts:
+    """Seeded generator of Telegram market posts shaped like the real archive.
+
+    Posts mix demand, supply, both and off-topic messages (``mix``) and
+    name one to three foods in the spellings people use: synonyms, the
+    article ('السكر'), a joined 'و' and the odd diacritic. Item popularity
+    follows a Zipf-like curve. About ``repost_rate`` of the posts repeat a
+    recent post exactly or with a small edit, so the repost filter has work
+    to do. Posts are spread evenly over ``days`` in chronological order and
+    the same seed always yields the same stream, at any size.
+    """
+
+    def __init__(self, seed=0, days=150, start=datetime(2025, 3, 1, tzinfo=timezone.utc), channels=3,
+                 repost_rate=0.3, mix=(0.55, 0.25, 0.05, 0.15)):
+        self.seed = seed
+        self.days = days
+        self.start = start
+        self.channels = [f"channel_{i}" for i in range(channels)]
+        self.repost_rate = repost_rate
+        self.mix = mix
+
+        rng = random.Random(seed)
+        names = list(food_items)
+        rng.shuffle(names)
+        self.items = names
+        self.spellings = {item: [item, *food_items[item]] for item in names}
+        self.cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(names))))
+
+    def _spell(self, rng, item, first=False):
+        word = rng.choice(self.spellings[item])
+        roll = rng.random()
+        if roll < 0.25 and " " not in word:
+            word = "ال" + word
+        elif roll < 0.30 and not first:
+            # The conjunction joins the later items of a list, never the first
+            word = "و" + word
+        elif roll < 0.33:
+            word = word[0] + "ّ" + word[1:]
+        return word
+
+    def _foods(self, rng):
+        items = rng.choices(self.items, cum_weights=self.cum_weights, k=rng.randint(1, 3))
+        return " و ".join(self._spell(rng, item, first=i == 0) for i, item in enumerate(items))
+
+    def _text(self, rng):
+        kind = rng.choices(("demand", "supply", "both", "other"), self.mix)[0]
+        if kind == "other":
+            return rng.choice(OTHER_TEMPLATES)
+        templates = {'demand': DEMAND_TEMPLATES, 'supply': SUPPLY_TEMPLATES, 'both': BOTH_TEMPLATES}[kind]
+        return rng.choice(templates).format(items=self._foods(rng), other=self._foods(rng),
+                                            qty=rng.choice(QUANTITIES), price=rng.randint(5, 120))
+
+    def iter_posts(self, n):
+        """Yield n posts as (id, channel, date, text); ids count up per channel."""
+        rng = random.Random(self.seed)
+        step = self.days * 86400 / max(n, 1)
+        recent = deque(maxlen=200)
+        next_ids = {channel: 1 for channel in self.channels}
+        for i in range(n):
+            if recent and rng.random() < self.repost_rate:
+                text = rng.choice(recent)
+                if rng.random() < 0.5:
+                    text += rng.choice(EDITS)
+            else:
+                text = self._text(rng)
+                recent.append(text)
+            channel = rng.choice(self.channels)
+            post_id = next_ids[channel]
+            next_ids[channel] += 1
+            date = self.start + timedelta(seconds=int(i * step))
+            yield post_id, channel, date, text
+
+    def frames(self, n, batch_size=100_000):
+        """The same posts as raw-store DataFrames of at most ``batch_size`` rows."""
+        batch = []
+        for post in self.iter_posts(n):
+            batch.append(post)
+            if len(batch) == batch_size:
+                yield pd.DataFrame(batch, columns=RAW_COLUMNS)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=RAW_COLUMNS)
+
+    def channel_posts(self, n):
+        """{channel: [(date, text)]} for fake_telegram.FakeTelegramClient."""
+        channels = {channel: [] for channel in self.channels}
+        for _, channel, date, text in self.iter_posts(n):
+            channels[channel].append((date, text))
+        return channels
+
+
+def write_raw_store(store, n, generator=None, batch_size=100_000):
+    """Fill the raw dataset of a store with n synthetic posts; returns the rows written."""
+    generator = generator or SyntheticPosts()
+    return sum(store.write(RAW, df, mode="append") for df in generator.frames(n, batch_size))
@@ -1,57 +1,259 @@
 import os
+import io
+import hashlib
+import inspect
+import functools
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 import matplotlib.font_manager as fm
-import arabic_reshaper
-from bidi.algorithm import get_display
+from matplotlib.figure import Figure
+import metrics
 from datetime import datetime
-import seaborn as sns
-
-# Output directory
+from daily_cube import DailyCube, counts_path
+from storage import PartitionedStore, DAILY, load_daily_frames
+from daily_matrix import DailyMatrix, matrix_path
+from gap_panel import GapPanel
+from correlation import CorrelationStats
+from day_range import day_rows
+
+# Output directory, only used for charts saved to disk
 output_dir = "visualizations"
-os.makedirs(output_dir, exist_ok=True)
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_font(family='Arial'):
+    """Font file for the chart labels, looked up once per process."""
+    return fm.findfont(fm.FontProperties(family=family))
+
+
+@functools.lru_cache(maxsize=4096)
+def reshape_arabic(text):
+    # Imported on first use so importing this module stays cheap
+    import arabic_reshaper
+    from bidi.algorithm import get_display
+    return get_display(arabic_reshaper.reshape(text))
+
+
+def frame_fingerprint(*frames):
+    """Hash of the columns and values of DataFrames, used as the data version of charts."""
+    digest = hashlib.sha256()
+    for df in frames:
+        digest.update("\x1f".join(map(str, df.columns)).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+def first_change(old_df, new_df, columns):
+    """Row of the first day where two daily frames differ in their days or ``columns``; the shorter length if none."""
+    n = min(len(old_df), len(new_df))
+    changed = old_df['day'].to_numpy()[:n] != new_df['day'].to_numpy()[:n]
+    changed |= (old_df[columns].to_numpy(dtype=float)[:n] != new_df[columns].to_numpy(dtype=float)[:n]).any(axis=1)
+    rows = np.flatnonzero(changed)
+    return int(rows[0]) if len(rows) else n
+
+
+def file_fingerprint(*paths):
+    """(path, mtime, size) of files a chart reads directly."""
+    stamps = []
+    for path in paths:
+        if os.path.exists(path):
+            stat = os.stat(path)
+            stamps.append((path, stat.st_mtime_ns, stat.st_size))
+    return stamps
+
+
+def chart(method):
+    """Turn a method returning (figure, filename) into a plot method with output options.
+
+    ``output="png"`` (default) returns the PNG bytes, ``output="figure"``
+    returns the matplotlib Figure. Files are only written to the output
+    directory when ``save=True`` or the visualizer has ``save_to_disk``.
+    PNG requests are served from the render cache when one is attached.
+    Returns None when there is no data to plot. Each call is recorded as a
+    ``render.<method>`` stage of the active metrics run, if any.
+    """
+    signature = inspect.signature(method)
+
+    def draw(self, args, kwargs, output, save):
+        save = self.save_to_disk if save is None else save
+        key = None
+        if output == "png" and self.cache is not None:
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            params = dict(bound.arguments)
+            params.pop('self')
+
+            version = [self.data_version]
+            if 'csv_path' in params:
+                version.append(file_fingerprint(params['csv_path'], counts_path(params['csv_path'])))
+            key = self.cache.key(method.__name__, params, version)
+            # A hit cannot name the file to save, so saving always renders
+            if not save:
+                png = self.cache.get(key)
+                if png is not None:
+                    return png
+
+        result = method(self, *args, **kwargs)
+        if result is None:
+            return None
+        fig, filename = result
+        if output == "figure":
+            if save:
+                self.save_plot(self.render(fig), filename)
+            return fig
+
+        png = self.render(fig)
+        if save:
+            self.save_plot(png, filename)
+        if key is not None:
+            self.cache.put(key, png)
+        return png
+
+    @functools.wraps(method)
+    def wrapper(self, *args, output="png", save=None, **kwargs):
+        caches = {'render': self.cache} if self.cache is not None else None
+        with metrics.stage(f"render.{method.__name__}", caches=caches) as record:
+            result = draw(self, args, kwargs, output, save)
+            record['rows_out'] = int(result is not None)
+        return result
+
+    return wrapper
+
 
 class FoodMarketVisualizer:
-    def __init__(self, demand_df, supply_df):
-        self.demand_df = demand_df.copy()
-        self.supply_df = supply_df.copy()
-        self.demand_df['day'] = pd.to_datetime(self.demand_df['day'])
-        self.supply_df['day'] = pd.to_datetime(self.supply_df['day'])
-        self.arabic_font = fm.findfont(fm.FontProperties(family='Arial'))
+    def __init__(self, demand_df, supply_df, cache=None, save_to_disk=False, data_version=None):
+        # Frames are used as given (no copy), e.g. views of memory-mapped matrices
+        self.demand_df = self.by_day(demand_df)
+        self.supply_df = self.by_day(supply_df)
+        self.arabic_font = resolve_font('Arial')
         self.font_prop = fm.FontProperties(fname=self.arabic_font)
+        self._cubes = {}
+        # Optional render_cache.RenderCache; charts are keyed on this data version, a hash of
+        # the frames unless the caller already knows one (e.g. the file names of a matrix save)
+        self.cache = cache
+        self.save_to_disk = save_to_disk
+        self.data_version = data_version or frame_fingerprint(self.demand_df, self.supply_df)
+
+    def updated(self, demand_df, supply_df, data_version=None):
+        """A visualizer over new frames that reuses this one's correlation statistics up to the first changed day.
+
+        Only the days from the first one that was added, changed or removed
+        (on either side) are summed again; the gap panel views the frames
+        and costs nothing to rebuild.
+        """
+        viz = FoodMarketVisualizer(demand_df, supply_df, cache=self.cache, save_to_disk=self.save_to_disk,
+                                   data_version=data_version)
+        if 'correlation_stats' in self.__dict__:
+            frames = {'demand': (self.demand_df, viz.demand_df), 'supply': (self.supply_df, viz.supply_df)}
+            stats = {}
+            for data_type, (old, new) in frames.items():
+                previous = self.correlation_stats[data_type]
+                if list(CorrelationStats.numeric_columns(new)) != previous.items:
+                    continue
+                stats[data_type] = previous.updated(new['day'], new[previous.items].to_numpy(dtype=float),
+                                                    first_change(old, new, previous.items))
+            if len(stats) == len(frames):
+                viz.correlation_stats = stats
+        return viz
+
+    @classmethod
+    def from_store(cls, store=None, start_date=None, end_date=None, items=None):
+        """Build a visualizer from the daily partitions in a date range; other days are never read or densified."""
+        demand_df, supply_df = load_daily_frames(store, start_date, end_date, items)
+        return cls(demand_df, supply_df)
+
+    @classmethod
+    def from_matrices(cls, store=None, cache=None, start_date=None, end_date=None):
+        """Build a visualizer over the store's memory-mapped daily matrices (see ``daily_matrix``)."""
+        store = store or PartitionedStore()
+        demand = DailyMatrix.load(matrix_path(store, DAILY['demand']))
+        supply = DailyMatrix.load(matrix_path(store, DAILY['supply']))
+        return cls(demand.frame(start_date, end_date), supply.frame(start_date, end_date), cache=cache)
+
+    @staticmethod
+    def by_day(df):
+        """A daily frame with a datetime 'day' column in ascending order; converted only if it is not already."""
+        if not pd.api.types.is_datetime64_any_dtype(df['day']):
+            df = df.assign(day=pd.to_datetime(df['day']))
+        if not df['day'].is_monotonic_increasing:
+            df = df.sort_values('day', ignore_index=True)
+        return df
+
+    @staticmethod
+    def between(df, start_date=None, end_date=None):
+        """Rows of a daily frame between two dates (inclusive), found by binary search on its sorted days."""
+        return df.iloc[day_rows(df['day'].to_numpy(), start_date, end_date)]
+
+    @functools.cached_property
+    def gap_panel(self):
+        """Aligned demand/supply/difference for every item, built on first use."""
+        return GapPanel(self.demand_df, self.supply_df)
+
+    @functools.cached_property
+    def correlation_stats(self):
+        """Running pairwise statistics per data type, for correlation over any window."""
+        return {
+            'demand': CorrelationStats.from_frame(self.demand_df),
+            'supply': CorrelationStats.from_frame(self.supply_df),
+        }
+
+    def load_cube(self, csv_path):
+        """Count cube saved next to a daily CSV, or None for CSVs built before cubes existed."""
+        path = counts_path(csv_path)
+        if not os.path.exists(path):
+            return None
+        mtime = os.path.getmtime(path)
+        cached = self._cubes.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = self._cubes[path] = (mtime, DailyCube.load(path))
+        return cached[1]
 
     def reshape(self, text):
-        return get_display(arabic_reshaper.reshape(text))
-
-    def save_plot(self, filename):
-        """Helper to save the current matplotlib figure to the output directory."""
+        return reshape_arabic(text)
+
+    def new_figure(self, figsize):
+        """A standalone Figure (not registered with pyplot), so concurrent sessions never share state."""
+        fig = Figure(figsize=figsize)
+        return fig, fig.subplots()
+
+    def render(self, fig):
+        """PNG bytes of a figure, rendered in memory."""
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', bbox_inches='tight')
+        return buffer.getvalue()
+
+    def save_plot(self, png, filename):
+        """Helper to save rendered PNG bytes to the output directory."""
+        os.makedirs(output_dir, exist_ok=True)
         path = os.path.join(output_dir, filename)
-        plt.savefig(path, bbox_inches='tight')
-        plt.close()
+        with open(path, 'wb') as f:
+            f.write(png)
+        return path
                 # Explaination of the methods:
 
     # Plotting methods , 
     # No.01 plot daily demand vs supply
 
+    @chart
     def plot_daily(self, column, start_date=None, end_date=None):
-        df1 = self.demand_df.copy()
-        df2 = self.supply_df.copy()
+        df1 = self.demand_df
+        df2 = self.supply_df
 
         if start_date and end_date:
             start_date = pd.Timestamp(start_date)
             end_date = pd.Timestamp(end_date)
-            df1 = df1[(df1['day'] >= start_date) & (df1['day'] <= end_date)]
-            df2 = df2[(df2['day'] >= start_date) & (df2['day'] <= end_date)]
+            df1 = self.between(df1, start_date, end_date)
+            df2 = self.between(df2, start_date, end_date)
 
         if df1.empty:
             print("No demand data available for the selected period.")
             return
 
-        plt.figure(figsize=(12, 6))
-        plt.plot(df1['day'], df1[column], marker='o', linewidth=2, label=self.reshape(f"الطلب على ال{column}"))
+        fig, ax = self.new_figure(figsize=(12, 6))
+        ax.plot(df1['day'], df1[column], marker='o', linewidth=2, label=self.reshape(f"الطلب على ال{column}"))
 
         if not df2.empty:
-            plt.plot(df2['day'], df2[column], marker='s', linewidth=2, linestyle='--',
+            ax.plot(df2['day'], df2[column], marker='s', linewidth=2, linestyle='--',
                     label=self.reshape(f"العرض على ال{column}"))
 
         # Safely show the date range only if both are set
@@ -60,14 +262,14 @@ class FoodMarketVisualizer:
         else:
             date_range_text = ""
 
-        plt.title(self.reshape(f"مقارنة الطلب والعرض على {column}{date_range_text}"),
+        ax.set_title(self.reshape(f"مقارنة الطلب والعرض على {column}{date_range_text}"),
                 fontsize=20, fontproperties=self.font_prop)
-        plt.xlabel(self.reshape("اليوم"), fontsize=14, fontproperties=self.font_prop)
-        plt.ylabel(self.reshape("النسبة المئوية"), fontsize=14, fontproperties=self.font_prop)
-        plt.legend(prop=self.font_prop)
-        plt.grid(True)
-        plt.xticks(rotation=45)
-        plt.tight_layout()
+        ax.set_xlabel(self.reshape("اليوم"), fontsize=14, fontproperties=self.font_prop)
+        ax.set_ylabel(self.reshape("النسبة المئوية"), fontsize=14, fontproperties=self.font_prop)
+        ax.legend(prop=self.font_prop)
+        ax.grid(True)
+        ax.tick_params(axis='x', labelrotation=45)
+        fig.tight_layout()
 
         # Save plot
         if start_date and end_date:
@@ -75,48 +277,45 @@ class FoodMarketVisualizer:
         else:
             filename = f"daily_{column}_full.png"
 
-        self.save_plot(filename)
+        return fig, filename
 
 
+    @chart
     def plot_difference(self, column, start_date=None, end_date=None):
-        merged = pd.merge(
-            self.demand_df[['day', column]],
-            self.supply_df[['day', column]],
-            on='day', suffixes=('_demand', '_supply')
-        )
-
         # Convert date safely
         if start_date and end_date:
             start_date = pd.Timestamp(start_date)
             end_date = pd.Timestamp(end_date)
-            merged = merged[(merged['day'] >= start_date) & (merged['day'] <= end_date)]
+            merged = self.gap_panel.frame(column, start_date, end_date)
+        else:
+            merged = self.gap_panel.frame(column)
+        # Only days present in both demand and supply
+        merged = merged.dropna(subset=['difference'])
 
         if merged.empty:
             print("No data available for the selected period.")
             return
 
-        merged['difference'] = merged[f'{column}_demand'] - merged[f'{column}_supply']
-
-        plt.figure(figsize=(12, 6))
-        plt.plot(merged['day'], merged['difference'], color='black', linewidth=2,
+        fig, ax = self.new_figure(figsize=(12, 6))
+        ax.plot(merged['day'], merged['difference'], color='black', linewidth=2,
                 label=self.reshape('الفرق بين الطلب والعرض'))
-        plt.axhline(0, color='gray', linestyle='--')
-        plt.fill_between(merged['day'], merged['difference'], 0, where=merged['difference'] > 0,
+        ax.axhline(0, color='gray', linestyle='--')
+        ax.fill_between(merged['day'], merged['difference'], 0, where=merged['difference'] > 0,
                         color='red', alpha=0.3, label=self.reshape('عجز'))
-        plt.fill_between(merged['day'], merged['difference'], 0, where=merged['difference'] < 0,
+        ax.fill_between(merged['day'], merged['difference'], 0, where=merged['difference'] < 0,
                         color='green', alpha=0.3, label=self.reshape('فائض'))
 
         title_text = f"الفرق بين الطلب والعرض على {column}"
         if start_date and end_date:
             title_text += f" ({start_date.date()} → {end_date.date()})"
 
-        plt.title(self.reshape(title_text), fontsize=20, fontproperties=self.font_prop)
-        plt.xlabel(self.reshape("اليوم"), fontsize=14, fontproperties=self.font_prop)
-        plt.ylabel(self.reshape("الفرق (٪)"), fontsize=14, fontproperties=self.font_prop)
-        plt.legend(prop=self.font_prop)
-        plt.grid(True)
-        plt.xticks(rotation=45)
-        plt.tight_layout()
+        ax.set_title(self.reshape(title_text), fontsize=20, fontproperties=self.font_prop)
+        ax.set_xlabel(self.reshape("اليوم"), fontsize=14, fontproperties=self.font_prop)
+        ax.set_ylabel(self.reshape("الفرق (٪)"), fontsize=14, fontproperties=self.font_prop)
+        ax.legend(prop=self.font_prop)
+        ax.grid(True)
+        ax.tick_params(axis='x', labelrotation=45)
+        fig.tight_layout()
 
         # Save plot
         if start_date and end_date:
@@ -124,21 +323,29 @@ class FoodMarketVisualizer:
         else:
             filename = f"difference_{column}_full.png"
 
-        self.save_plot(filename)
+        return fig, filename
 
 
     # No.02 plot total food percentages
 
+    @chart
     def plot_total_food_percentages(self, csv_path, start_date, end_date, title="نسبة ظهور المواد الغذائية"):
-        df = pd.read_csv(csv_path, encoding="utf-8-sig")
-        df['day'] = pd.to_datetime(df['day'])
-
-        df = df[(df['day'] >= start_date) & (df['day'] <= end_date)]
-        if df.empty:
-            print("No data for selected period.")
-            return
-
-        food_sums = df.drop(columns=['day']).sum().sort_values(ascending=False)
+        cube = self.load_cube(csv_path)
+        if cube is not None:
+            # Raw counts: every post weighs the same, whatever its day's volume
+            food_sums = cube.total_series(start_date, end_date)
+            if food_sums.sum() == 0:
+                print("No data for selected period.")
+                return
+        else:
+            df = self.by_day(pd.read_csv(csv_path, encoding="utf-8-sig"))
+            df = self.between(df, start_date, end_date)
+            if df.empty:
+                print("No data for selected period.")
+                return
+            food_sums = df.drop(columns=['day']).sum()
+
+        food_sums = food_sums.sort_values(ascending=False)
         food_sums = food_sums[food_sums > 0]
         total = food_sums.sum()
         labels, sizes = [], []
@@ -155,122 +362,128 @@ class FoodMarketVisualizer:
             labels.append(self.reshape("أخرى"))
             sizes.append(others)
 
-        plt.figure(figsize=(10, 10))
-        plt.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=140, textprops={'fontsize': 13})
-        plt.axis('equal')
+        fig, ax = self.new_figure(figsize=(10, 10))
+        ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=140, textprops={'fontsize': 13})
+        ax.axis('equal')
         range_text = f"{start_date.date()} → {end_date.date()}"
-        plt.title(self.reshape(f"{title} ({range_text})"), fontsize=18, fontproperties=self.font_prop)
-        plt.tight_layout()
+        ax.set_title(self.reshape(f"{title} ({range_text})"), fontsize=18, fontproperties=self.font_prop)
+        fig.tight_layout()
 
         # Save plot
         filename = f"piechart_{start_date.date()}_{end_date.date()}.png"
-        self.save_plot(filename)
+        return fig, filename
 
     # No.03 plot correlation matrix
 
-    def plot_correlation_matrix(self, data_type='demand', top_n=10):
-        # Choose dataframe
-        df = self.demand_df.copy() if data_type == 'demand' else self.supply_df.copy()
-        # Drop non-numeric or non-food columns
-        df_numeric = df.drop(columns=['day'], errors='ignore').select_dtypes(include='number')
-        if df_numeric.empty:
+    @chart
+    def plot_correlation_matrix(self, data_type='demand', top_n=10, start_date=None, end_date=None, window=None):
+        # Choose precomputed statistics; window=N uses the last N days up to end_date
+        stats = self.correlation_stats[data_type]
+        if not stats.items or not len(stats):
             print("No numeric data found for correlation.")
             return
+        if window:
+            end_date = pd.Timestamp(end_date) if end_date is not None else pd.Timestamp(stats.days[len(stats) - 1])
+            start_date = end_date - pd.Timedelta(days=window - 1)
+        # A correlation needs at least two days
+        lo, hi = stats.bounds(start_date, end_date)
+        if hi - lo < 2:
+            print("Not enough data available for the selected period.")
+            return
         # Select top N items by total sum
-        top_items = df_numeric.sum().sort_values(ascending=False).head(top_n).index.tolist()
-        df_top = df_numeric[top_items]
-        corr = df_top.corr()
+        top_items = stats.top_items(top_n, start_date, end_date)
+        corr = stats.corr(top_items, start_date, end_date)
         # Reshape Arabic labels
         reshaped_labels = [self.reshape(col) for col in corr.columns]
         # Plot heatmap
-        plt.figure(figsize=(10, 8))
+        import seaborn as sns
+        fig, ax = self.new_figure(figsize=(10, 8))
         sns.heatmap(corr, annot=True, cmap='coolwarm', fmt=".2f",
                     xticklabels=reshaped_labels, yticklabels=reshaped_labels,
-                    cbar_kws={'label': self.reshape('Correlation Coefficient')})
+                    cbar_kws={'label': self.reshape('Correlation Coefficient')}, ax=ax)
         title_text = f"Correlation Matrix of Top {top_n} Items  ({'الطلب' if data_type == 'demand' else 'العرض'})"
-        plt.title(self.reshape(title_text), fontsize=18, fontproperties=self.font_prop)
-        plt.xticks(rotation=45)
-        plt.yticks(rotation=0)
-        plt.tight_layout()
+        ax.set_title(self.reshape(title_text), fontsize=18, fontproperties=self.font_prop)
+        ax.tick_params(axis='x', labelrotation=45)
+        ax.tick_params(axis='y', labelrotation=0)
+        fig.tight_layout()
         # Save
         filename = f"correlation_top{top_n}_{data_type}.png"
-        self.save_plot(filename)
+        if start_date is not None or end_date is not None:
+            range_text = "_".join(str(pd.Timestamp(d).date()) if d is not None else "all" for d in (start_date, end_date))
+            filename = f"correlation_top{top_n}_{data_type}_{range_text}.png"
+        return fig, filename
 
     # No.04 plot daily comparison bar for month
 
+    @chart
     def plot_daily_comparison_bar_for_month(self, column, year, month):
         # Filter the month from both demand and supply
-        df_demand = self.demand_df.copy()
-        df_supply = self.supply_df.copy()
-
-        # Filter by selected year and month
-        df_demand = df_demand[(df_demand['day'].dt.year == year) & (df_demand['day'].dt.month == month)]
-        df_supply = df_supply[(df_supply['day'].dt.year == year) & (df_supply['day'].dt.month == month)]
-
-        if df_demand.empty or df_supply.empty:
+        month_start = pd.Timestamp(year, month, 1)
+        month_end = month_start + pd.offsets.MonthEnd(1)
+        rows = self.gap_panel.bounds(month_start, month_end)
+        demand = self.gap_panel.demand[rows]
+        supply = self.gap_panel.supply[rows]
+
+        # Days with a row in each frame
+        if np.isnan(demand).all() or np.isnan(supply).all():
             print("No data available for the selected month.")
             return
 
         # Check if the column exists
-        if column not in df_demand.columns or column not in df_supply.columns:
+        if column not in self.gap_panel.item_index:
             print(f"Column '{column}' does not exist in the data.")
             return
 
-        # Group by day
-        demand_daily = df_demand.groupby(df_demand['day'].dt.day)[column].sum()
-        supply_daily = df_supply.groupby(df_supply['day'].dt.day)[column].sum()
-
-        days = sorted(set(demand_daily.index) | set(supply_daily.index))
-        demand_values = [demand_daily.get(day, 0) for day in days]
-        supply_values = [supply_daily.get(day, 0) for day in days]
+        j = self.gap_panel.item_index[column]
+        days = pd.DatetimeIndex(self.gap_panel.days[rows]).day.tolist()
+        demand_values = np.nan_to_num(demand[:, j])
+        supply_values = np.nan_to_num(supply[:, j])
 
         # Plot
         x = range(len(days))
         width = 0.4
 
-        plt.figure(figsize=(14, 6))
-        plt.bar([i - width/2 for i in x], demand_values, width=width, label=self.reshape(f"الطلب على {column}"))
-        plt.bar([i + width/2 for i in x], supply_values, width=width, label=self.reshape(f"العرض على {column}"))
+        fig, ax = self.new_figure(figsize=(14, 6))
+        ax.bar([i - width/2 for i in x], demand_values, width=width, label=self.reshape(f"الطلب على {column}"))
+        ax.bar([i + width/2 for i in x], supply_values, width=width, label=self.reshape(f"العرض على {column}"))
 
         day_labels = [self.reshape(str(day)) for day in days]
-        plt.xticks(ticks=x, labels=day_labels, rotation=0, fontsize=12)
+        ax.set_xticks(list(x))
+        ax.set_xticklabels(day_labels, rotation=0, fontsize=12)
         month_name = datetime(year, month, 1).strftime("%B %Y")
-        plt.title(self.reshape(f"مقارنة يومية بين العرض والطلب على {column} في شهر {month_name}"), fontsize=18, fontproperties=self.font_prop)
-        plt.xlabel(self.reshape("اليوم"), fontsize=14, fontproperties=self.font_prop)
-        plt.ylabel(self.reshape("الإجمالي"), fontsize=14, fontproperties=self.font_prop)
-        plt.legend(prop=self.font_prop)
-        plt.grid(axis='y')
-        plt.tight_layout()
+        ax.set_title(self.reshape(f"مقارنة يومية بين العرض والطلب على {column} في شهر {month_name}"), fontsize=18, fontproperties=self.font_prop)
+        ax.set_xlabel(self.reshape("اليوم"), fontsize=14, fontproperties=self.font_prop)
+        ax.set_ylabel(self.reshape("الإجمالي"), fontsize=14, fontproperties=self.font_prop)
+        ax.legend(prop=self.font_prop)
+        ax.grid(axis='y')
+        fig.tight_layout()
 
         # Save
         filename = f"daily_bar_{column}_{year}_{month:02d}.png"
-        self.save_plot(filename)
-
-
-
-
+        return fig, filename
 
-# cleaned CSVs
-demand_df = pd.read_csv("Data/DailyDemand.csv", encoding="utf-8-sig")
-supply_df = pd.read_csv("Data/DailySellers.csv", encoding="utf-8-sig")
 
-# the visualizer
-viz = FoodMarketVisualizer(demand_df, supply_df)
+if __name__ == "__main__":
+    # cleaned CSVs
+    demand_df = pd.read_csv("Data/DailyDemand.csv", encoding="utf-8-sig")
+    supply_df = pd.read_csv("Data/DailySellers.csv", encoding="utf-8-sig")
 
-# Plot daily demand vs supply for suger
-viz.plot_daily("سكر", start_date=datetime(2025, 6, 1), end_date=datetime(2025, 6, 30))
+    # the visualizer
+    viz = FoodMarketVisualizer(demand_df, supply_df, save_to_disk=True)
 
-# Plot difference chart for suger
-viz.plot_difference("سكر", start_date=datetime(2025, 6, 1), end_date=datetime(2025, 6, 30))
+    # Plot daily demand vs supply for suger
+    viz.plot_daily("سكر", start_date=datetime(2025, 6, 1), end_date=datetime(2025, 6, 30))
 
-# Pie chart of total demand percentages
-viz.plot_total_food_percentages("Data/DailyDemand.csv", start_date=datetime(2025, 6, 1), end_date=datetime(2025, 7, 15),title='نسبة الطلب على المواد الغذائية')
+    # Plot difference chart for suger
+    viz.plot_difference("سكر", start_date=datetime(2025, 6, 1), end_date=datetime(2025, 6, 30))
 
-viz.plot_correlation_matrix(data_type='supply')
+    # Pie chart of total demand percentages
+    viz.plot_total_food_percentages("Data/DailyDemand.csv", start_date=datetime(2025, 6, 1), end_date=datetime(2025, 7, 15),title='نسبة الطلب على المواد الغذائية')
 
-viz.plot_daily_comparison_bar_for_month(
-    column="طحين",
-    year=2025,
-    month=6
-)
+    viz.plot_correlation_matrix(data_type='supply')
 
+    viz.plot_daily_comparison_bar_for_month(
+        column="طحين",
+        year=2025,
+        month=6
+    )
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from correlation import CorrelationStats
+
+
+@pytest.fixture
+def daily():
+    rng = np.random.default_rng(0)
+    days = pd.date_range('2025-03-01', periods=120, freq='D')
+    # Drop some calendar days so windows by day count and by date differ
+    days = days[rng.random(len(days)) > 0.2]
+    values = rng.random((len(days), 4)) * 100
+    values[:, 1] += values[:, 0] * 0.5
+    return pd.DataFrame(values, columns=['سكر', 'رز', 'زيت', 'طحين']).assign(day=days)
+
+
+def test_corr_matches_pandas(daily):
+    stats = CorrelationStats.from_frame(daily, block=8)
+    items = ['سكر', 'رز', 'زيت', 'طحين']
+    window = daily[(daily['day'] >= '2025-04-01') & (daily['day'] <= '2025-05-15')]
+    np.testing.assert_allclose(stats.corr(items, '2025-04-01', '2025-05-15').to_numpy(),
+                               window[items].corr().to_numpy(), atol=1e-9)
+
+
+@pytest.mark.parametrize('window', [7, 30])
+def test_rolling_corr_matches_pandas_rolling(daily, window):
+    stats = CorrelationStats.from_frame(daily, block=8)
+    items = ['سكر', 'رز', 'زيت', 'طحين']
+    expected = daily.set_index('day')[items].rolling(f"{window}D").corr()
+    for end_date in daily['day'].iloc[[10, 45, -1]]:
+        np.testing.assert_allclose(stats.rolling_corr(window, end_date, items).to_numpy(),
+                                   expected.loc[end_date].to_numpy(), atol=1e-9)
+
+
+def test_rolling_corr_defaults_to_last_day(daily):
+    stats = CorrelationStats.from_frame(daily)
+    last = daily['day'].iloc[-1]
+    pd.testing.assert_frame_equal(stats.rolling_corr(14), stats.rolling_corr(14, last))
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'window': 1},
+    {'start_date': '2026-01-01', 'end_date': '2026-01-31'},
+])
+def test_correlation_chart_needs_two_days(daily, kwargs):
+    from visualizer import FoodMarketVisualizer
+    viz = FoodMarketVisualizer(daily, daily)
+    assert viz.plot_correlation_matrix(**kwargs) is None
+    assert viz.plot_correlation_matrix(window=30) is not None
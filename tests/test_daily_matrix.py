@@ -0,0 +1,55 @@
+import os
+import json
+from unittest import mock
+import numpy as np
+import pandas as pd
+import pytest
+from daily_matrix import DailyMatrix
+from gap_panel import GapPanel
+from correlation import CorrelationStats
+
+ITEMS = ['سكر', 'رز', 'زيت']
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.random((100, len(ITEMS))) * 100, columns=ITEMS)
+    df.insert(0, 'day', pd.date_range('2025-03-01', periods=100))
+    return df
+
+
+def values_files(directory):
+    return sorted(entry for entry in os.listdir(directory) if entry.endswith(".npy"))
+
+
+def test_mapped_values_file_is_removed_by_a_later_save(tmp_path, frame):
+    path = str(tmp_path / "daily_demand.json")
+    DailyMatrix.from_frame(frame).save(path)
+    mapped = DailyMatrix.load(path)
+    # What Windows does while another process still maps the file
+    with mock.patch("os.remove", side_effect=PermissionError("file in use")):
+        DailyMatrix.from_frame(frame).save(path)
+    assert len(values_files(tmp_path)) == 2
+    np.testing.assert_array_equal(mapped.values, DailyMatrix.load(path).values)
+
+    DailyMatrix.from_frame(frame).save(path)
+    with open(path, encoding="utf-8") as f:
+        assert values_files(tmp_path) == [json.load(f)['values']]
+
+
+def test_panel_and_correlation_view_the_mapped_values(tmp_path, frame):
+    path = str(tmp_path / "daily_demand.json")
+    DailyMatrix.from_frame(frame).save(path)
+    matrix = DailyMatrix.load(path)
+    df = matrix.frame()
+
+    panel = GapPanel(df, df.assign(**{item: 0.0 for item in ITEMS}))
+    assert np.shares_memory(panel.demand, matrix.values)
+    np.testing.assert_allclose(panel.frame('رز')['difference'], frame['رز'])
+
+    stats = CorrelationStats.from_frame(df)
+    assert np.shares_memory(stats._rows, matrix.values)
+    expected = frame.set_index('day').loc['2025-03-10':'2025-05-20'].corr()
+    np.testing.assert_allclose(stats.corr(start_date='2025-03-10', end_date='2025-05-20').to_numpy(),
+                               expected.to_numpy(), atol=1e-10)
@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+from day_range import day_rows
+
+DAYS = ['2025-03-01', '2025-03-02', '2025-03-04', '2025-03-05']
+
+
+@pytest.mark.parametrize('unit', ['D', 'ns'])
+@pytest.mark.parametrize('start, end, expected', [
+    (None, None, slice(0, 4)),
+    ('2025-03-02', '2025-03-04', slice(1, 3)),
+    ('2025-03-03', None, slice(2, 4)),
+    ('2025-03-05', '2025-03-01', slice(3, 3)),
+])
+def test_rows_cover_dates_inclusively(unit, start, end, expected):
+    assert day_rows(np.array(DAYS, dtype=f'datetime64[{unit}]'), start, end) == expected
+
+
+def test_times_within_a_day_keep_that_day():
+    days = np.array(DAYS, dtype='datetime64[D]')
+    assert day_rows(days, '2025-03-02 12:00', '2025-03-04 08:00') == slice(1, 3)
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta, timezone
+from itertools import permutations
+import pandas as pd
+import pytest
+from dedup import RepostFilter
+from arabic_normalize import normalize_text
+from Daily_Data_percntage import iter_csv_posts
+
+START = datetime(2025, 3, 1, 8, tzinfo=timezone.utc)
+ITEMS = ["سكر", "زيت", "ارز", "طحين", "عدس", "حليب", "شاي", "قهوه"]
+
+
+def posts_over_days(days=6, per_day=8):
+    """Posts every 3 hours, each offer reposted 2 hours later and again 2 days later."""
+    # Offers naming different items in a different order, so no two are near duplicates
+    offers = permutations(ITEMS, 3)
+    rows = []
+    for i in range(days * per_day):
+        time = START + timedelta(hours=3 * i)
+        text = "مطلوب " + " و".join(next(offers)) + f" للبيع بالجمله {i}"
+        rows += [(time, text), (time + timedelta(hours=2), text + " !!"), (time + timedelta(days=2), text)]
+    return pd.DataFrame(rows, columns=['date', 'text']).sort_values('date', kind='stable', ignore_index=True)
+
+
+def test_normalize_text_folds_marks_punctuation_and_spelling():
+    assert normalize_text("مطلوبٌ  سُكَّر، أرز!!") == normalize_text("مطلوب سكر ارز")
+
+
+def test_reposts_inside_window_are_dropped():
+    posts = posts_over_days()
+    post_filter = RepostFilter()
+    kept = post_filter.filter_frame(posts)
+    # The copy 2 hours later is a near duplicate, the one 2 days later is outside the window
+    assert post_filter.dropped == len(posts) // 3
+    assert len(kept) == 2 * len(posts) // 3
+
+
+def test_out_of_order_posts_are_rejected():
+    post_filter = RepostFilter()
+    post_filter.is_duplicate(START + timedelta(days=1), "مطلوب سكر")
+    with pytest.raises(ValueError, match="chronological"):
+        post_filter.is_duplicate(START, "مطلوب زيت")
+
+
+@pytest.mark.parametrize('chunksize', [1000, 7])
+def test_newest_first_csv_matches_date_order(tmp_path, chunksize):
+    posts = posts_over_days()
+    oldest_first = RepostFilter()
+    expected = oldest_first.filter_frame(posts)
+
+    # The shipped CSVs and old RawData.csv exports list the newest post first
+    csv_path = tmp_path / "posts.csv"
+    posts.iloc[::-1].to_csv(csv_path, index=False, encoding="utf-8-sig")
+    post_filter = RepostFilter()
+    result = list(iter_csv_posts(csv_path, chunksize=chunksize, post_filter=post_filter))
+
+    assert post_filter.dropped == oldest_first.dropped
+    assert len(post_filter._signatures) < len(posts)
+    assert sorted(result) == sorted(zip(pd.to_datetime(expected['date']).dt.date, expected['text']))
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+from gap_panel import GapPanel
+
+
+def daily(days, values):
+    return pd.DataFrame({'day': pd.to_datetime(days), **values})
+
+
+@pytest.fixture
+def panel():
+    # 2025-03-04 has no data on either side
+    days = ['2025-03-01', '2025-03-02', '2025-03-03', '2025-03-05', '2025-03-06', '2025-03-07']
+    demand = daily(days, {'سكر': [50.0, 60.0, 40.0, 70.0, 55.0, 10.0], 'رز': [10.0, 10.0, 10.0, 10.0, 10.0, 10.0]})
+    supply = daily(days, {'سكر': [20.0, 30.0, 50.0, 20.0, 25.0, 30.0], 'رز': [40.0, 40.0, 5.0, 40.0, 40.0, 40.0]})
+    return GapPanel(demand, supply)
+
+
+def test_frame_slices_item_and_dates(panel):
+    frame = panel.frame('سكر', '2025-03-02', '2025-03-05')
+    assert list(frame['day'].dt.day) == [2, 3, 5]
+    assert list(frame['difference']) == [30.0, -10.0, 50.0]
+
+
+@pytest.mark.parametrize('window', [1, 2, 3, 5])
+def test_rolling_mean_uses_calendar_days(panel, window):
+    expected = panel.frame('سكر').set_index('day')['difference'].rolling(f"{window}D", min_periods=1).mean()
+    result = panel.rolling_mean('سكر', window)
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy())
+    assert (result.index == expected.index).all()
+
+
+def test_rolling_mean_skips_nan():
+    demand = daily(['2025-03-01', '2025-03-02', '2025-03-03'], {'سكر': [10.0, 20.0, 30.0]})
+    supply = daily(['2025-03-01', '2025-03-03'], {'سكر': [5.0, 5.0]})
+    result = GapPanel(demand, supply).rolling_mean('سكر', 2)
+    np.testing.assert_allclose(result.to_numpy(), [5.0, 5.0, 25.0])
+
+
+def test_missing_day_breaks_streak(panel):
+    streaks = panel.streaks('سكر')
+    assert list(streaks['kind']) == ['shortage', 'surplus', 'shortage', 'surplus']
+    assert list(streaks['days']) == [2, 1, 2, 1]
+    assert list(streaks['start'].dt.day) == [1, 3, 5, 7]
+    assert list(streaks['end'].dt.day) == [2, 3, 6, 7]
+
+
+def test_rank_undersupplied(panel):
+    ranking = panel.rank_undersupplied(top_n=2)
+    assert list(ranking.index) == ['سكر', 'رز']
+    assert ranking['سكر'] == pytest.approx(np.mean([30, 30, -10, 50, 30, -20]))
+    assert list(panel.rank_undersupplied('2025-03-03', '2025-03-03').index) == ['رز', 'سكر']
@@ -0,0 +1,40 @@
+import pytest
+from keyword_matcher import KeywordMatcher
+from Daily_Data_percntage import food_items
+
+matcher = KeywordMatcher(food_items)
+
+
+def matches(text):
+    return [matcher.items[i] for i in matcher.iter_matches(text)]
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("مطلوب سكّر", ['سكر']),
+    ("السكر والزيت", ['سكر', 'زيت']),
+    ("للسكر", ['سكر']),
+    ("بالدقيق", ['طحين']),
+    # ل + اللبن is written 'للبن'; stripping 'لل' would leave 'بن'
+    ("للبن", ['لبن']),
+    ("وللبن", ['لبن']),
+    ("اللبن", ['لبن']),
+])
+def test_article_is_stripped_only_down_to_listed_words(text, expected):
+    assert matches(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("سكر وزيت ورز", ['سكر', 'زيت', 'رز']),
+    ("تمر وتين", ['تمر', 'تين']),
+    ("عدس مجروش وعدس", ['عدس', 'عدس']),
+    # A name, not 'and figs'
+    ("وتين", []),
+    ("مطلوب وتين للتواصل", []),
+    ("مطلوب ورق", []),
+])
+def test_joined_conjunction_only_continues_a_list(text, expected):
+    assert matches(text) == expected
+
+
+def test_multi_word_items_consume_their_words():
+    assert matches("ورق العنب وجوز الهند") == ['ورق عنب', 'جوز الهند']
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+from daily_matrix import DailyMatrix, matrix_path
+from live_data import LiveData
+from correlation import CorrelationStats
+from storage import PartitionedStore, DAILY
+
+ITEMS = ['سكر', 'رز', 'زيت']
+
+
+def save_matrices(store, days, seed=0):
+    rng = np.random.default_rng(seed)
+    for i, name in enumerate(DAILY.values()):
+        df = pd.DataFrame(rng.random((days, len(ITEMS))) * 100, columns=ITEMS)
+        df.insert(0, 'day', pd.date_range('2025-03-01', periods=days))
+        DailyMatrix.from_frame(df).save(matrix_path(store, name))
+
+
+@pytest.fixture
+def live(tmp_path):
+    store = PartitionedStore(str(tmp_path / "store"))
+    save_matrices(store, 100)
+    return LiveData(store, check_interval=0)
+
+
+def test_new_days_only_sum_the_changed_blocks(live):
+    before = live.current()
+    before.correlation_stats
+    # The same 100 days followed by 20 new ones
+    save_matrices(live.store, 120)
+    after = live.current()
+    assert after is not before and after.data_version != before.data_version
+
+    stats, old = after.correlation_stats['demand'], before.correlation_stats['demand']
+    assert len(stats) == 120
+    # Snapshots of the blocks before day 100 are shared, not summed again
+    assert all(a is b for a, b in zip(stats._sums[:100 // stats.block + 1], old._sums))
+    expected = CorrelationStats.from_frame(after.demand_df)
+    np.testing.assert_allclose(stats.corr().to_numpy(), expected.corr().to_numpy(), atol=1e-9)
+
+
+def test_changed_values_are_summed_again(live):
+    live.current().correlation_stats
+    save_matrices(live.store, 100, seed=1)
+    viz = live.current()
+    expected = CorrelationStats.from_frame(viz.supply_df)
+    np.testing.assert_allclose(viz.correlation_stats['supply'].corr().to_numpy(), expected.corr().to_numpy(), atol=1e-9)
+
+
+def test_failed_reload_keeps_the_previous_data(live, monkeypatch):
+    viz = live.current()
+    save_matrices(live.store, 120)
+
+    def removed_under_us():
+        raise FileNotFoundError("partition removed by a running build")
+
+    monkeypatch.setattr(live, "_load_matrices", removed_under_us)
+    assert live.current() is viz
+    monkeypatch.undo()
+    assert len(live.current().demand_df) == 120
+
+
+def test_first_load_failure_is_raised(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        LiveData(PartitionedStore(str(tmp_path / "store")), demand_csv=str(tmp_path / "missing.csv")).current()
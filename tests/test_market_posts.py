@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+from MarketPosts import build_daily_percentages
+from dedup import RepostFilter
+from storage import PartitionedStore, RAW, CLASSIFIED
+from synthetic_posts import SyntheticPosts, write_raw_store
+
+
+@pytest.fixture(scope="module")
+def raw_store(tmp_path_factory):
+    store = PartitionedStore(str(tmp_path_factory.mktemp("raw") / "store"))
+    # 80 days: several shards of at most 32 days, a few of them per worker
+    write_raw_store(store, 6000, SyntheticPosts(days=80))
+    return store
+
+
+def build(raw_store, tmp_path, workers, dedup):
+    store = PartitionedStore(str(tmp_path / "store"))
+    for day, part_dir in raw_store.partitions(RAW):
+        store.write(RAW, raw_store.read_partition(part_dir))
+    outputs = {'demand': str(tmp_path / "demand.csv"), 'supply': str(tmp_path / "supply.csv")}
+    counts = build_daily_percentages(outputs=outputs, store=store, dedup=dedup, workers=workers)
+    return counts, {label: open(path, encoding="utf-8-sig").read() for label, path in outputs.items()}, store
+
+
+@pytest.mark.parametrize('dedup', [True, False])
+def test_parallel_build_matches_serial(raw_store, tmp_path, dedup):
+    serial_counts, serial_csv, serial_store = build(raw_store, tmp_path / "serial", 1, dedup)
+    parallel_counts, parallel_csv, parallel_store = build(raw_store, tmp_path / "parallel", 3, dedup)
+    assert parallel_counts == serial_counts
+    assert parallel_csv == serial_csv
+    pd.testing.assert_frame_equal(parallel_store.read(CLASSIFIED), serial_store.read(CLASSIFIED))
+
+
+def test_fingerprints_give_the_serial_decisions(raw_store):
+    posts = raw_store.read(RAW).sort_values('date', kind='stable')
+    posts.loc[posts.index[::50], 'text'] = None
+    serial = RepostFilter()
+    expected = [not serial.is_duplicate(t, text) for t, text in zip(pd.to_datetime(posts['date'], utc=True), posts['text'])]
+
+    batched = RepostFilter()
+    keep = [kept for day in posts.groupby(pd.to_datetime(posts['date'], utc=True).dt.date, sort=True)
+            for kept in batched.check_many(day[1]['date'], batched.fingerprints(day[1]['text'].tolist()))]
+    assert keep == expected
+    assert (batched.seen, batched.dropped) == (serial.seen, serial.dropped)
@@ -0,0 +1,82 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import metrics
+from arabic_normalize import TokenTable
+
+
+def _work(n):
+    with metrics.capture() as run:
+        table = TokenTable(len)
+        with metrics.stage("work", rows_in=n, caches={'tokens': table}) as record:
+            for token in ["سكر", "زيت", "سكر"] * n:
+                table[token]
+            record['rows_out'] = n
+    return run.stages
+
+
+def test_worker_stages_are_merged_into_the_parent_run(tmp_path):
+    with metrics.run("test", metrics_dir=str(tmp_path)) as run:
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            for stages in pool.map(_work, [1, 2, 3]):
+                metrics.merge(stages)
+    entry = run.summary()['stages']['work']
+    assert (entry['calls'], entry['rows_in'], entry['rows_out']) == (3, 6, 6)
+    # Each worker resolves its two words once; every other lookup is a hit
+    assert entry['caches']['tokens'] == {'hits': 18 - 6, 'misses': 6, 'hit_rate': 12 / 18}
+
+
+def test_token_table_counts_its_own_lookups():
+    table = TokenTable(len)
+    for token in ["سكر", "سكر", "زيت"]:
+        table[token]
+    assert (table.lookups, table.misses, table.hits) == (3, 2, 1)
+
+
+def test_peak_memory_is_optional(tmp_path, monkeypatch):
+    # What Windows looks like: no /proc and no resource module
+    monkeypatch.setattr(metrics, "_STATUS", str(tmp_path / "status"))
+    monkeypatch.setattr(metrics, "_CLEAR_REFS", str(tmp_path / "clear_refs"))
+    monkeypatch.setattr(metrics, "resource", None)
+    with metrics.run("test", metrics_dir=str(tmp_path)) as run:
+        with metrics.stage("outer"), metrics.stage("inner"):
+            pass
+    assert run.summary()['stages']['inner']['peak_rss_mb'] is None
+    assert not os.path.exists(tmp_path / "clear_refs")
+
+
+def _profiled_work(n):
+    with metrics.capture() as run:
+        for _ in range(n):
+            with metrics.stage("work"):
+                sum(range(1000))
+    return run.stages
+
+
+def test_repeated_stages_share_one_profile(tmp_path):
+    with metrics.run("test", metrics_dir=str(tmp_path), profile=["work"]) as run:
+        for _ in range(3):
+            with metrics.stage("work"):
+                sum(range(1000))
+    profiles = run.summary()['stages']['work']['profiles']
+    assert len(profiles) == 1
+    assert sorted(p.name for p in tmp_path.glob("*.prof")) == [os.path.basename(profiles[0])]
+
+
+def test_worker_profiles_get_their_own_files(tmp_path, monkeypatch):
+    monkeypatch.setenv(metrics.PROFILE_ENV, "work")
+    monkeypatch.setenv(metrics.METRICS_DIR_ENV, str(tmp_path))
+    with metrics.run("test", metrics_dir=str(tmp_path)) as run:
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            for stages in pool.map(_profiled_work, [1, 2, 3]):
+                metrics.merge(stages)
+    profiles = run.summary()['stages']['work']['profiles']
+    assert len(set(profiles)) == 3
+    assert all(os.path.exists(path) for path in profiles)
+
+
+def test_runs_started_together_save_to_different_files(tmp_path):
+    first, second = metrics.Run("ui", str(tmp_path)), metrics.Run("ui", str(tmp_path))
+    assert first.save() != second.save()
+    # Saving again rewrites the run's own file
+    assert first.save() == first.save()
+    assert len(list(tmp_path.glob("*.json"))) == 2
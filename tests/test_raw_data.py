@@ -0,0 +1,55 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pytest
+from RawData import fetch_channels, parse_date
+from fake_telegram import FakeTelegramClient
+from storage import PartitionedStore, RAW
+
+
+def channel_posts(n_channels=3, n_posts=200):
+    start = datetime(2025, 3, 1, tzinfo=timezone.utc)
+    return {f"channel_{c}": [(start + timedelta(minutes=i), f"مطلوب سكر {c} {i}") for i in range(n_posts)]
+            for c in range(n_channels)}
+
+
+class FailingStore(PartitionedStore):
+    def write(self, name, df, mode="append"):
+        raise OSError("disk full")
+
+
+def test_fetch_channels_writes_every_post(tmp_path):
+    store = PartitionedStore(str(tmp_path / "store"))
+    posts = channel_posts()
+    results = asyncio.run(fetch_channels(FakeTelegramClient(posts), list(posts), {}, store=store,
+                                         checkpoint_path=str(tmp_path / "checkpoints.json"), batch_size=10))
+    assert results == {channel: 200 for channel in posts}
+    assert len(store.read(RAW)) == 600
+
+
+def test_writer_failure_is_raised_instead_of_hanging(tmp_path):
+    store = FailingStore(str(tmp_path / "store"))
+    posts = channel_posts()
+    checkpoints = {}
+
+    async def fetch():
+        # Far more batches than the queue holds, so the fetchers would block on a dead writer
+        return await asyncio.wait_for(
+            fetch_channels(FakeTelegramClient(posts), list(posts), checkpoints, store=store, concurrency=2,
+                           checkpoint_path=str(tmp_path / "checkpoints.json"), batch_size=5),
+            timeout=10)
+
+    with pytest.raises(OSError, match="disk full"):
+        asyncio.run(fetch())
+    assert checkpoints == {}
+
+
+@pytest.mark.parametrize('value, end_of_day, expected', [
+    ("2025-08-01", False, datetime(2025, 8, 1, tzinfo=timezone.utc)),
+    ("2025-08-01", True, datetime(2025, 8, 1, 23, 59, 59, 999999, tzinfo=timezone.utc)),
+    ("2025-08-01T10:00", False, datetime(2025, 8, 1, 10, tzinfo=timezone.utc)),
+    # An explicit offset is converted, not replaced
+    ("2025-08-01T10:00+03:00", False, datetime(2025, 8, 1, 7, tzinfo=timezone.utc)),
+])
+def test_parse_date(value, end_of_day, expected):
+    parsed = parse_date(value, end_of_day)
+    assert parsed == expected and parsed.utcoffset() == timedelta(0)
@@ -0,0 +1,26 @@
+import pandas as pd
+import pytest
+import storage
+from storage import PartitionedStore, RAW, RAW_COLUMNS, DAILY, DAILY_COLUMNS
+
+
+def raw_posts(days=3):
+    dates = pd.date_range('2025-03-01 08:00', periods=days, freq='D', tz='UTC')
+    return pd.DataFrame({'id': range(days), 'channel': 'market', 'date': dates, 'text': [f"post {i}" for i in range(days)]})
+
+
+@pytest.mark.parametrize('batch', [1, 32])
+def test_reads_keep_the_written_columns(tmp_path, monkeypatch, batch):
+    monkeypatch.setattr(storage, 'READ_BATCH', batch)
+    store = PartitionedStore(str(tmp_path))
+    store.write(RAW, raw_posts())
+    daily = pd.DataFrame({'day': pd.to_datetime(['2025-03-01', '2025-03-02']), 'item': ['سكر', 'رز'], 'count': [3, 4]})
+    store.write(DAILY['demand'], daily)
+
+    assert list(store.read(RAW).columns) == RAW_COLUMNS
+    assert [list(df.columns) for _, df in store.iter_partitions(RAW)] == [RAW_COLUMNS] * 3
+    assert list(store.read(DAILY['demand']).columns) == DAILY_COLUMNS
+
+    csv_path = tmp_path / "RawData.csv"
+    store.export_csv(RAW, csv_path)
+    assert list(pd.read_csv(csv_path, encoding="utf-8-sig").columns) == RAW_COLUMNS